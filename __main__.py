@@ -0,0 +1,5 @@
+"""Run the game with: python path/to/this/folder [LOG]"""
+
+from main import main
+
+main()
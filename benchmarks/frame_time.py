@@ -0,0 +1,102 @@
+"""Time Window.draw() with the ANSI Terminal against the old os.system path,
+and count the bytes written per turn with and without differential redraw.
+
+The old path spawned a shell four times per frame (two osascript calls,
+a printf resize and clear) before printing the frame line by line.
+
+    python benchmarks/frame_time.py [FRAMES]
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import HeadlessGame
+from main import Window
+from terminal import Terminal
+
+SCRIPT = [
+    "go north", "go north", "take axe", "go east", "go east", "go south",
+    "look around", "help", "go west", "cut tree", "go south", "go south"
+    ]
+
+
+def legacy_draw(window, engine, map):
+    """Window.draw() as it was before the Terminal backend"""
+
+    os.system('osascript -e \'tell app "System Events" to tell process "Terminal" to set frontmost to true\'')
+    os.system(f'osascript -e \'tell app "Terminal" to set font size of first window to "{window.font_size}"\'')
+    os.system(f'printf "\\e[8;{window.height};{window.width}t"')
+    os.system('clear')
+
+    for line in window.build_frame(engine, map):
+        print(line)
+
+
+def time_frames(draw, frames):
+    """Return seconds per frame, with stdout and stderr sent to /dev/null"""
+
+    game = HeadlessGame(seed=0)
+    window = Window(23, 84, 28)
+
+    sys.stdout.flush()
+    saved_out, saved_err = os.dup(1), os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    try:
+        start = time.perf_counter()
+        for frame in range(frames):
+            draw(window, game.engine, game.map)
+        sys.stdout.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.dup2(saved_out, 1)
+        os.dup2(saved_err, 2)
+        os.close(devnull)
+
+    return elapsed / frames
+
+
+def bytes_per_turn(full_redraw):
+    """Play SCRIPT, drawing every turn, return average bytes written"""
+
+    game = HeadlessGame(seed=0)
+    window = Window(23, 84, 28)
+    stream = io.StringIO()
+    window.terminal = Terminal(23, 84, 28, stream)
+    window.terminal.is_setup = True
+
+    for command in SCRIPT:
+        if full_redraw:
+            window.terminal.previous_frame = None
+        # HeadlessGame.step(), with a draw between entering and acting
+        game.map.enter_room(game.engine)
+        window.draw(game.engine, game.map)
+        game.window.next_command = command
+        game.last_action = game.engine.take_action(game.window, game.map)
+        game.engine.get_story_display(
+            game.last_action, game.map.current_room.get_description(game.session))
+
+    return len(stream.getvalue().encode()) / len(SCRIPT)
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    legacy = time_frames(legacy_draw, frames)
+    current = time_frames(Window.draw, frames)
+
+    print(f"os.system draw: {legacy * 1000:8.3f} ms/frame")
+    print(f"Terminal draw:  {current * 1000:8.3f} ms/frame")
+    print(f"speedup:        {legacy / current:8.1f}x")
+
+    full = bytes_per_turn(full_redraw=True)
+    diff = bytes_per_turn(full_redraw=False)
+
+    print(f"full redraw:    {full:8.0f} bytes/turn")
+    print(f"differential:   {diff:8.0f} bytes/turn")
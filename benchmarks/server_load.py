@@ -0,0 +1,113 @@
+"""Load test server.py: many concurrent players, each sending commands
+and timing how long the reply takes, then report p50/p99 latency.
+
+The server runs in a child process on a Unix socket, so the clients
+and the server don't share an event loop.  Each player waits think
+seconds on average between commands, like a person would.
+
+    python benchmarks/server_load.py [--sessions 1000 10000] [--commands 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = ["go north", "go east", "go south", "go west", "take axe", "take map", "cut tree"]
+TITLE_PROMPT = b"game! "
+PROMPT = b"    > "
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def player(path, commands, think, latencies, connect_limit):
+    async with connect_limit:
+        reader, writer = await asyncio.open_unix_connection(path, limit=1 << 20)
+
+    rng = random.Random()
+
+    try:
+        await reader.readuntil(TITLE_PROMPT)
+        writer.write(b"\n")
+        await reader.readuntil(PROMPT)
+
+        for turn in range(commands):
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+            start = time.perf_counter()
+            writer.write(rng.choice(COMMANDS).encode() + b"\n")
+            await reader.readuntil(PROMPT)
+            latencies.append(time.perf_counter() - start)
+
+    except asyncio.IncompleteReadError:
+        # Midnight came first, the server closed the session
+        pass
+
+    finally:
+        writer.close()
+
+
+async def load(path, sessions, commands, think):
+    latencies = []
+    connect_limit = asyncio.Semaphore(500)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[player(path, commands, think, latencies, connect_limit)
+                           for session in range(sessions)])
+    elapsed = time.perf_counter() - start
+
+    return (latencies, elapsed)
+
+
+def run(sessions, commands, think):
+    path = os.path.join(tempfile.mkdtemp(), "tenenbaum.sock")
+
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"),
+                               "--unix", path, "--seed", "0", "--turns", "1000"])
+
+    try:
+        while not os.path.exists(path):
+            time.sleep(0.05)
+
+        latencies, elapsed = asyncio.run(load(path, sessions, commands, think))
+
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{sessions:>6,} sessions {len(latencies):>8,} commands in {elapsed:6.1f}s"
+          f"  p50 {percentile(latencies, 0.50) * 1000:7.2f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1000:7.2f} ms"
+          f"  ({len(latencies) / elapsed:,.0f} commands/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server.py latency under load.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--commands', type=int, default=20, help="commands per session")
+    parser.add_argument('--think', type=float, default=2.0,
+                        help="average seconds between a player's commands")
+    args = parser.parse_args()
+
+    # Every session is a socket at each end
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, 2 * max(args.sessions) + 1024)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    for sessions in args.sessions:
+        run(sessions, args.commands, args.think)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Benchmark suite for TENENBAUM, with a stored baseline.
+
+Every case is seeded, so it does the same work on every run.  Within a
+run each case is timed a few times and the fastest is kept, as seconds
+per call and relative to a calibration loop timed alongside it.  The
+whole suite is run several times over, and each case's median relative
+time is compared against benchmarks/baseline.json.
+
+A baseline holds the median of --runs full runs for each case, and a
+threshold set from how far apart those runs were, never under
+MIN_THRESHOLD.  A case slower than its baseline by more than its
+threshold is reported as a regression, so noisy cases get more room
+than steady ones.
+
+    python benchmarks/suite.py              compare against the baseline
+    python benchmarks/suite.py --save       store these results as the baseline
+    python benchmarks/suite.py parse draw   only the cases named, or starting so
+
+Calibration evens out a busy or throttled machine, but baselines are
+still best compared on the machine that stored them.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import read_input
+import text_display
+from headless import HeadlessGame
+from main import ROOM_DISTRIBUTION, GameSession, Window
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Full runs of the suite to take medians over, when comparing and saving
+COMPARE_RUNS = 3
+SAVE_RUNS = 5
+
+# A case's threshold is SPREAD_FACTOR times the spread of the runs that
+# stored its baseline, (slowest - fastest) / median, at least MIN_THRESHOLD
+SPREAD_FACTOR = 2
+MIN_THRESHOLD = 0.20
+
+WORDS = [
+    "go", "move", "walk", "north", "east", "south", "west", "take", "grab",
+    "pick", "up", "the", "axe", "map", "tree", "cut", "chop", "down", "help",
+    "please", "now", "Santa", "snow", "pine", "willow", "quickly!", "(tree)",
+    "then", "rest", "well", "best", "feel", "nroth", "tkae", "chpo"
+    ]
+
+SCRIPT = [
+    "go north", "take axe", "go east", "go south", "take map", "go south",
+    "cut tree", "go west", "go north", "go north", "look around", "go east"
+    ]
+
+
+class NullStream(object):
+    """Text stream that throws away everything written to it"""
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def random_text(rng, size):
+    """Return about size characters of words, with some long ones"""
+
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS) if rng.random() < 0.98 else "x" * rng.randrange(20, 80)
+        words.append(word)
+        length += len(word) + 1
+
+    return " ".join(words)
+
+
+def commands(rng, count):
+    return [" ".join(rng.choice(WORDS) for word in range(rng.randrange(1, 6)))
+            for command in range(count)]
+
+
+def parse_case():
+    lines = commands(random.Random(1), 1000)
+
+    def run():
+        # Cold cache, so this is the tokenizer and not the LRU
+        read_input.cached_parse.cache_clear()
+        read_input.fuzzy_match.cache_clear()
+        for line in lines:
+            read_input.parse(line)
+
+    return run, len(lines)
+
+
+def layout_case(function, size):
+    texts = [random_text(random.Random(seed), size) for seed in range(10)]
+
+    def run():
+        for text in texts:
+            function(text, 46)
+
+    return run, len(texts)
+
+
+def new_map_case(distribution=None):
+    session = GameSession(0, distribution=distribution)
+    map = session.map
+    seeds = list(range(100))
+
+    def run():
+        for seed in seeds:
+            map.seed = seed
+            map.rng = random.Random(seed)
+            map.tiles = map.new_map()
+            map.tiles.load_region(0, 0, 5, 5)
+
+    return run, len(seeds)
+
+
+def tile_images_case():
+    game = HeadlessGame(0)
+    game.run(SCRIPT)
+
+    def run():
+        for repeat in range(100):
+            game.map.get_tile_images(game.engine)
+
+    return run, 100
+
+
+def draw_case(full_redraw):
+    # Two points in the same game, drawn in turn, so every frame differs
+    # from the last the way a turn does
+    games = []
+    for turns in (5, 6):
+        game = HeadlessGame(0)
+        game.run(SCRIPT[:turns])
+        game.session.finish_turn(game.last_action)
+        games.append(game)
+
+    window = Window(23, 84, 28, NullStream())
+    window.terminal.is_setup = True
+
+    def run():
+        for repeat in range(50):
+            for game in games:
+                if full_redraw:
+                    window.terminal.previous_frame = None
+                window.draw(game.engine, game.map)
+
+    return run, 100
+
+
+def build_frame_case():
+    game = HeadlessGame(0)
+    game.run(SCRIPT)
+    game.session.finish_turn(game.last_action)
+    window = Window(23, 84, 28, NullStream())
+
+    def run():
+        for repeat in range(100):
+            window.build_frame(game.engine, game.map)
+
+    return run, 100
+
+
+def games_case(distribution=None):
+    seeds = list(range(200))
+
+    def run():
+        for seed in seeds:
+            HeadlessGame(seed, distribution=distribution).run(SCRIPT)
+
+    return run, len(seeds)
+
+
+# key = case name, value = function returning (run, calls per run)
+CASES = {
+    'parse': parse_case,
+    'fit_text_100': lambda: layout_case(text_display.fit_text, 100),
+    'fit_text_10k': lambda: layout_case(text_display.fit_text, 10000),
+    'center_100': lambda: layout_case(text_display.center, 100),
+    'center_10k': lambda: layout_case(text_display.center, 10000),
+    'left_align_100': lambda: layout_case(text_display.left_align, 100),
+    'left_align_10k': lambda: layout_case(text_display.left_align, 10000),
+    'new_map_fixed': new_map_case,
+    'new_map_chunked': lambda: new_map_case(ROOM_DISTRIBUTION),
+    'get_tile_images': tile_images_case,
+    'build_frame': build_frame_case,
+    'draw_full': lambda: draw_case(True),
+    'draw_diff': lambda: draw_case(False),
+    'headless_game': games_case,
+    'headless_game_chunked': lambda: games_case(ROOM_DISTRIBUTION)
+    }
+
+
+def calibration():
+    """A fixed bit of plain Python work, to measure the machine's speed
+    at the moment a case runs
+    """
+
+    words = {}
+    for number in range(2000):
+        word = str(number * 7919)
+        words[word] = words.get(word[-2:], 0) + len(word)
+
+    return words
+
+
+def time_case(make_case, repeats=15, min_time=0.05):
+    """Return (fastest time per call in seconds, that divided by the
+    fastest calibration run next to it).
+
+    Like timeit, the garbage collector is off while timing, and the
+    fastest of many short repeats is the one least disturbed by anything
+    else on the machine.  Calibration runs are interleaved with the
+    repeats, so the ratio stays put when the whole machine slows down.
+    """
+
+    run, calls = make_case()
+
+    # Enough runs per repeat to take min_time, at least one
+    start = time.perf_counter()
+    run()
+    once = time.perf_counter() - start
+    runs = max(1, int(min_time / max(once, 1e-9)))
+
+    best = None
+    best_calibration = None
+    gc.disable()
+    try:
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            calibration()
+            elapsed = time.perf_counter() - start
+            if best_calibration is None or elapsed < best_calibration:
+                best_calibration = elapsed
+
+            start = time.perf_counter()
+            for each in range(runs):
+                run()
+            elapsed = (time.perf_counter() - start) / (runs * calls)
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        gc.enable()
+
+    return (best, best / best_calibration)
+
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.2f} us"
+
+
+def run_suite(names, runs):
+    """Time every named case, runs times over, a whole pass of the suite
+    at a time so a slow spell on the machine doesn't land on one case.
+    Return {name: {'seconds', 'relative', 'spread'}}, medians of the runs.
+    """
+
+    samples = {name: [] for name in names}
+
+    for run in range(runs):
+        for name in names:
+            samples[name].append(time_case(CASES[name]))
+
+    results = {}
+    for name, times in samples.items():
+        seconds = statistics.median(time for time, relative in times)
+        relatives = [relative for time, relative in times]
+        relative = statistics.median(relatives)
+
+        results[name] = {
+            'seconds': seconds,
+            'relative': relative,
+            'spread': (max(relatives) - min(relatives)) / relative
+            }
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument('cases', nargs='*', help="case names, or their beginnings")
+    parser.add_argument('--save', action='store_true', help="store results as the baseline")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--runs', type=int,
+                        help=f"full runs to take medians over, default {COMPARE_RUNS}, "
+                             f"or {SAVE_RUNS} with --save")
+    parser.add_argument('--threshold', type=float,
+                        help="fraction slower than the baseline that counts as a "
+                             "regression, instead of each case's own")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES
+             if not args.cases or any(name.startswith(case) for case in args.cases)]
+    runs = args.runs or (SAVE_RUNS if args.save else COMPARE_RUNS)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    results = run_suite(names, runs)
+    regressions = []
+
+    for name, result in results.items():
+        result['threshold'] = max(MIN_THRESHOLD, SPREAD_FACTOR * result['spread'])
+
+        line = f"{name:24} {format_time(result['seconds'])}  spread {result['spread']:5.0%}"
+        if name in baseline and not args.save:
+            threshold = args.threshold
+            if threshold is None:
+                threshold = baseline[name].get('threshold', MIN_THRESHOLD)
+
+            ratio = result['relative'] / baseline[name]['relative']
+            line += f"  {ratio:6.2f}x baseline (limit {1 + threshold:.2f}x)"
+            if ratio > 1 + threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+    if args.save:
+        # Keep baselines of cases that weren't run this time
+        baseline.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'runs': runs, 'results': baseline}, baseline_file, indent=2)
+            baseline_file.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Compare read_input.parse() against the original parser.
+
+The original stripped special chars with one split/join per char, then
+checked every word against every synonym list.
+
+    python benchmarks/tokenizer.py [COMMANDS]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import read_input
+from read_input import lexicon
+
+PHRASES = [
+    "go north", "Move north!", "walk EAST", "run, left!", "go down",
+    "take the axe", "Pick up the axe, dummy!", "grab map", "look around",
+    "chop down the tree", "fell tree.", "cut (tree)", "help", "help me?",
+    "what is this", "go home", "take a nap", "examine the map..."
+    ]
+
+
+def legacy_parse(raw_input):
+    """read_input.process() as it was, minus the call to input()"""
+
+    verb = ""
+    object = ""
+
+    special_chars = [
+        "!", "@", "#", "$", "%", "^", "&", "*", "(", ")",
+        "-", "_", "=", "+", "{", "}", "[", "]", "|", "\\",
+        ":", ";", '"', "'", ",", "<", ">", ".", "?", "~", "`"
+        ]
+
+    words = raw_input.split(" ")
+
+    for char in special_chars:
+        words = char.join(words).split(char)
+
+    for word in words:
+        l_word = word.lower()
+
+        for word_type in lexicon['verbs']:
+            if l_word in lexicon['verbs'][word_type]:
+                verb = word_type
+
+        for word_type in lexicon['objects']:
+            if l_word in lexicon['objects'][word_type]:
+                object = word_type
+
+    return {'verb': verb, 'object': object}
+
+
+def time_parser(parse, commands):
+    start = time.perf_counter()
+    for command in commands:
+        parse(command)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    rng = random.Random(0)
+    commands = [rng.choice(PHRASES) for i in range(count)]
+
+    for command in PHRASES:
+        assert read_input.parse(command) == legacy_parse(command), command
+
+    legacy = time_parser(legacy_parse, commands)
+    current = time_parser(read_input.parse, commands)
+
+    print(f"{count:,} commands")
+    print(f"original parser: {legacy:7.2f}s ({legacy / count * 1e6:6.2f} us/command)")
+    print(f"read_input.parse: {current:6.2f}s ({current / count * 1e6:6.2f} us/command)")
+    print(f"speedup:         {legacy / current:7.1f}x")
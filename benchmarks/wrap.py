@@ -0,0 +1,81 @@
+"""Time text_display word wrapping from 1KB to 10MB of text, against
+the original fit_text, which popped words off the front of a list.
+
+The original is quadratic, so it is skipped above 1MB unless asked for.
+
+    python benchmarks/wrap.py [--legacy-all]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_display
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+WORDS = ["snow", "the", "Christmas", "tree", "axe", "a", "north", "barn",
+         "frozen", "pond", "midnight", "Santa", "willow", "lovely", "house"]
+
+
+def legacy_clean_text(text, line_width):
+    """clean_text() and fit_text() as they were"""
+
+    stripped_lines = []
+    for line in text.split("\n"):
+        stripped_lines.append(line.strip())
+    words = " ".join(stripped_lines).split(" ")
+
+    text_lines = ['']
+    i = 0
+    while len(words) > 0:
+        word = words[0]
+        line = text_lines[i]
+        if (len(line) + 1 + len(word) <= line_width) and (len(line) > 0):
+            text_lines[i] += " " + words.pop(0)
+        else:
+            text_lines.append(words.pop(0))
+            i += 1
+
+    return text_lines[1:]
+
+
+def make_text(size):
+    rng = random.Random(size)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.05:
+            word += "\n    "
+        words.append(word)
+        length += len(word) + 1
+
+    return " ".join(words)[:size]
+
+
+def seconds(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    legacy_all = "--legacy-all" in sys.argv
+
+    print(f"{'size':>10} {'clean_text':>12} {'left_align':>12} {'original':>12}")
+
+    for size in SIZES:
+        text = make_text(size)
+
+        current = seconds(text_display.clean_text, text, 46)
+        aligned = seconds(text_display.left_align, text, 46)
+
+        if size <= 1000000 or legacy_all:
+            legacy = f"{seconds(legacy_clean_text, text, 46):11.4f}s"
+        else:
+            legacy = "skipped"
+
+        print(f"{size:>10,} {current:11.4f}s {aligned:11.4f}s {legacy:>12}")
@@ -0,0 +1,202 @@
+"""Monte Carlo balancing for TENENBAUM.
+
+Plays seeded headless games across every core and reports how they end,
+so turns_left, the axe swing range and the room distribution can be tuned.
+
+wandering_player() - a simple bot, picks the next command for a game
+play_shard() - play a range of seeds, return aggregated results
+merge_results() - add aggregated results together
+run_farm() - spread games over a pool of worker processes
+main() - command line interface, run: python farm.py --help
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+
+from headless import ENDINGS, HeadlessGame
+from main import ROOM_IDS
+
+DIRECTIONS = ('north', 'east', 'south', 'west')
+
+
+def wandering_player(game):
+    """Return the next command for the game, or None once it is won.
+
+    Picks up anything useful, cuts the first tree it finds once it has
+    the axe, heads straight home with a tree, and otherwise wanders.
+    """
+
+    engine = game.engine
+    map = game.map
+    items = map.current_room.items
+    has_tree = 'tree' in engine.player_inventory
+
+    if has_tree:
+        if map.current_tile == map.home_tile:
+            return None
+
+        # Walk home, rows first
+        row, column = divmod(map.current_tile, map.width)
+        home_row, home_column = divmod(map.home_tile, map.width)
+        if row != home_row:
+            return "go north" if row > home_row else "go south"
+        return "go west" if column > home_column else "go east"
+
+    if 'axe' in items:
+        return "take axe"
+    if 'map' in items:
+        return "take map"
+    if 'tree' in items and 'axe' in engine.player_inventory:
+        return "cut tree"
+
+    return "go " + engine.streams.get('player').choice(DIRECTIONS)
+
+
+def new_results():
+    """Return empty aggregated results"""
+
+    return {
+        'games': 0,
+        'endings': Counter(),
+        'turns_left': Counter()
+        }
+
+
+def merge_results(total, results):
+    """Add results into total, return total"""
+
+    total['games'] += results['games']
+    total['endings'].update(results['endings'])
+    total['turns_left'].update(results['turns_left'])
+
+    return total
+
+
+def play_shard(shard):
+    """Play every seed in range(start, stop) with the given settings.
+    shard is a tuple (start, stop, settings), settings being keyword
+    arguments for HeadlessGame.  Return aggregated results only.
+    """
+
+    start, stop, settings = shard
+    results = new_results()
+    endings = results['endings']
+    turns_left = results['turns_left']
+
+    for seed in range(start, stop):
+        game = HeadlessGame(seed, **settings)
+
+        while not game.is_over():
+            command = wandering_player(game)
+            if command is None:
+                break
+            game.step(command)
+
+        endings[game.ending()] += 1
+        turns_left[game.engine.turns_left] += 1
+
+    results['games'] = stop - start
+
+    return results
+
+
+def run_farm(games, workers=None, first_seed=0, settings=None, shard_size=2000):
+    """Play seeds first_seed to first_seed + games over a pool of workers,
+    return the merged results.  The results only depend on the seeds and
+    settings, never on the number of workers.
+    """
+
+    settings = settings or {}
+    workers = workers or os.cpu_count()
+
+    shards = []
+    for start in range(first_seed, first_seed + games, shard_size):
+        stop = min(start + shard_size, first_seed + games)
+        shards.append((start, stop, settings))
+
+    total = new_results()
+
+    if workers == 1:
+        for shard in shards:
+            merge_results(total, play_shard(shard))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for results in pool.imap_unordered(play_shard, shards):
+                merge_results(total, results)
+
+    return total
+
+
+def load_distribution(path):
+    """Read a JSON file of {room id: weight}, return a distribution
+    over ROOM_IDS.  Rooms left out of the file keep a weight of 1.
+    """
+
+    with open(path) as weights_file:
+        weights = json.load(weights_file)
+
+    return [(room_id, weights.get(room_id, 1)) for room_id in ROOM_IDS]
+
+
+def print_results(results):
+    games = results['games']
+
+    print("Endings:")
+    for ending in ENDINGS:
+        count = results['endings'][ending]
+        print(f"    {ending:10} {count:10,} {count / games:8.2%}")
+
+    print("Turns left at the end:")
+    for turns in sorted(results['turns_left']):
+        count = results['turns_left'][turns]
+        print(f"    {turns:4} {count:10,} {count / games:8.2%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play seeded games on every core.")
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0, help="first seed")
+    parser.add_argument('--turns', type=int, help="turns_left at the start")
+    parser.add_argument('--swings', type=int, nargs=2, metavar=('MIN', 'MAX'),
+                        help="range of axe swings to cut a tree")
+    parser.add_argument('--weights', help="JSON file of {room id: weight}")
+    parser.add_argument('--scaling', action='store_true',
+                        help="also time 1, 2, 4... workers, up to --workers")
+    args = parser.parse_args(argv)
+
+    settings = {}
+    if args.turns is not None:
+        settings['turns_left'] = args.turns
+    if args.swings is not None:
+        settings['swing_range'] = tuple(args.swings)
+    if args.weights is not None:
+        settings['distribution'] = load_distribution(args.weights)
+
+    start = time.perf_counter()
+    results = run_farm(args.games, args.workers, args.seed, settings)
+    elapsed = time.perf_counter() - start
+
+    print_results(results)
+    print(f"{args.games:,} games on {args.workers} workers in {elapsed:.2f}s"
+          f" ({args.games / elapsed:,.0f} games/s)")
+
+    if args.scaling:
+        print("Scaling:")
+        workers = 1
+        baseline = None
+        while workers <= args.workers:
+            start = time.perf_counter()
+            run_farm(args.games, workers, args.seed, settings)
+            rate = args.games / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"    {workers:3} workers {rate:10,.0f} games/s {rate / baseline:6.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
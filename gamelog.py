@@ -0,0 +1,199 @@
+"""Replay log format for TENENBAUM.
+
+A replay log is an append-only binary file: a header with the seed,
+the Engine settings and the kind of map, then one record per
+Engine.take_action() call holding the line the player typed.  The
+seed and the map settings decide the map and every random stream, so
+replaying the lines headlessly plays the same game, see replay.py.
+
+    header - b'TNL2', turns_left (int16), swing_range (2 x uint8), seed
+        kind (0 = int, 1 = str), seed length (uint16), map height and
+        width (2 x uint16), distribution length (uint32), seed as
+        utf-8, then the distribution as JSON, empty for none
+    record - command length (1 byte, or 255 then uint16), then utf-8;
+        longer commands are cut down to MAX_COMMAND bytes, between
+        characters, before the Engine sees them
+
+Logs from before the map settings were recorded start with b'TNL1' and
+stop after the seed; they were all played on the 5x5 FixedWorld.
+
+This module needs nothing from the game, so main.py can record with it.
+
+fit_command() - a command cut down to fit in a record
+LogWriter - appends records to a log file
+RecordingWindow - wraps a Window, logs every command it reads
+read_log() - header and commands of a log
+"""
+
+import json
+import struct
+
+MAGIC = b'TNL2'
+HEADER = struct.Struct('<4shBBBHHHI')
+MAGIC_V1 = b'TNL1'
+HEADER_V1 = struct.Struct('<4shBBBH')
+LONG_COMMAND = 255
+LONG_LENGTH = struct.Struct('<H')
+
+# Longest command a record holds, in utf-8 bytes
+MAX_COMMAND = 0xFFFF
+
+SEED_INT = 0
+SEED_STR = 1
+
+
+def pack_header(seed, turns_left, swing_range, distribution=None, map_size=(5, 5)):
+    kind = SEED_INT if isinstance(seed, int) else SEED_STR
+    seed = str(seed).encode()
+
+    if distribution is None:
+        distribution = b''
+    else:
+        distribution = json.dumps([list(pair) for pair in distribution]).encode()
+
+    return HEADER.pack(MAGIC, turns_left, swing_range[0], swing_range[1],
+                       kind, len(seed), map_size[0], map_size[1],
+                       len(distribution)) + seed + distribution
+
+
+def fit_command(command):
+    """Return command cut down to at most MAX_COMMAND bytes of utf-8,
+    never in the middle of a character
+    """
+
+    data = command.encode()
+    if len(data) <= MAX_COMMAND:
+        return command
+
+    return data[:MAX_COMMAND].decode('utf-8', 'ignore')
+
+
+def pack_command(command):
+    """Return the record of a command, which must already fit"""
+
+    data = command.encode()
+
+    if len(data) < LONG_COMMAND:
+        return bytes([len(data)]) + data
+
+    return bytes([LONG_COMMAND]) + LONG_LENGTH.pack(len(data)) + data
+
+
+class LogWriter(object):
+    """Appends commands to a replay log.
+
+    A new or empty file gets the header first.  An existing log is only
+    appended to if its header matches the game being played, otherwise
+    ValueError is raised, since the commands would replay another game.
+
+    record() - add one command to the log, return it as it was logged
+    close() - close the file
+    """
+
+    def __init__(self, path, seed, turns_left, swing_range, distribution=None,
+                 map_size=(5, 5), flush=True):
+        self.path = path
+        self.flush = flush
+        header = pack_header(seed, turns_left, swing_range, distribution, map_size)
+
+        self.log_file = open(path, 'a+b')
+        self.log_file.seek(0)
+        existing = self.log_file.read(len(header))
+
+        if not existing:
+            self.log_file.write(header)
+        elif existing != header:
+            self.log_file.close()
+            raise ValueError(f"{path} is the log of another game, record to a new file")
+
+    def record(self, command):
+        """Log command, cut down to MAX_COMMAND bytes if it is longer.
+        Return it as it was logged, which is what the Engine has to be
+        given so a replay plays the same game.
+        """
+
+        command = fit_command(command)
+        self.log_file.write(pack_command(command))
+
+        # Keep every command played so far, in case the game crashes
+        if self.flush:
+            self.log_file.flush()
+
+        return command
+
+    def close(self):
+        self.log_file.close()
+
+
+class RecordingWindow(object):
+    """Takes the place of a Window, passing everything through to it
+    and logging every command it reads for Engine.take_action().
+    """
+
+    def __init__(self, window, log):
+        self.window = window
+        self.log = log
+        self.input_char = window.input_char
+
+    def draw(self, engine, map):
+        self.window.draw(engine, map)
+
+    def clear(self):
+        self.window.clear()
+
+    def read_command(self, prompt):
+        return self.log.record(self.window.read_command(prompt))
+
+    def pause(self, prompt):
+        self.window.pause(prompt)
+
+
+def read_log(data):
+    """Return (header, commands) from the bytes of a log, the header
+    being a dictionary of HeadlessGame keyword arguments.
+    """
+
+    magic = data[:len(MAGIC)]
+
+    if magic == MAGIC:
+        (magic, turns_left, swing_low, swing_high, kind, seed_size, height, width,
+         distribution_size) = HEADER.unpack_from(data)
+        offset = HEADER.size
+    elif magic == MAGIC_V1:
+        magic, turns_left, swing_low, swing_high, kind, seed_size = HEADER_V1.unpack_from(data)
+        height, width, distribution_size = 5, 5, 0
+        offset = HEADER_V1.size
+    else:
+        raise ValueError("not a TENENBAUM replay log")
+
+    seed = data[offset:offset + seed_size].decode()
+    if kind == SEED_INT:
+        seed = int(seed)
+    offset += seed_size
+
+    distribution = None
+    if distribution_size:
+        distribution = [tuple(pair) for pair in
+                        json.loads(data[offset:offset + distribution_size].decode())]
+        offset += distribution_size
+
+    header = {
+        'seed': seed,
+        'turns_left': turns_left,
+        'swing_range': (swing_low, swing_high),
+        'distribution': distribution,
+        'map_size': (height, width)
+        }
+
+    commands = []
+    size = len(data)
+    while offset < size:
+        length = data[offset]
+        offset += 1
+        if length == LONG_COMMAND:
+            (length,) = LONG_LENGTH.unpack_from(data, offset)
+            offset += LONG_LENGTH.size
+        commands.append(data[offset:offset + length].decode())
+        offset += length
+
+    return (header, commands)
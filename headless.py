@@ -0,0 +1,188 @@
+"""Headless mode for TENENBAUM, for scripted playthroughs.
+
+Nothing is drawn and nothing is read from the keyboard, so a game runs
+at in-process speed.  Use this for balancing and regression runs.
+
+HeadlessWindow - stand-in for Window, draws nothing, never waits on input
+HeadlessGame - step an Engine and Map one command at a time
+ENDINGS - the ways a game can end, see HeadlessGame.ending()
+run_game() - play one seeded game from a script, return its outcome
+run_batch() - play many seeded games, return a list of outcomes
+"""
+
+import sys
+import time
+
+import instrument
+from gamelog import LogWriter
+from main import ChristmasTree, GameSession
+
+# Best: a Christmas tree, at home.  Good: a Christmas tree, not home.
+# Arrested: any other tree.  Bad: no tree at all.
+ENDINGS = ('best', 'good', 'arrested', 'bad')
+
+
+class HeadlessWindow(object):
+    """Takes the place of Window in Engine.take_action().
+
+    .next_command - the line handed to the Engine on its next turn
+    """
+
+    def __init__(self):
+        self.input_char = "    > "
+        self.next_command = ""
+
+    def draw(self, engine, map):
+        pass
+
+    def clear(self):
+        pass
+
+    def read_command(self, prompt):
+        return self.next_command
+
+    def pause(self, prompt):
+        pass
+
+
+class HeadlessGame(object):
+    """A single game with no screen.
+
+    step() - play one turn, the same way GameSession.play() does after drawing
+    run() - play every command of a stream until it ends, or time runs out
+    is_over() - True once the clock strikes midnight
+    ending() - which of the ENDINGS the game has reached so far
+    outcome() - summary of the game so far
+
+    turns_left, swing_range and distribution override the Engine and
+    Map defaults, for balancing.  With a record path, every command is
+    appended to a replay log there, see gamelog.py.  map_size, from a
+    replay log, raises ValueError unless the Map comes out that size.
+    """
+
+    def __init__(self, seed=None, turns_left=None, swing_range=None,
+                 distribution=None, record=None, map_size=None):
+        self.session = GameSession(seed, HeadlessWindow(), distribution)
+        self.engine = self.session.engine
+        self.map = self.session.map
+        self.window = self.session.window
+        self.seed = self.engine.streams.seed
+
+        size = (self.map.height, self.map.width)
+        if map_size is not None and tuple(map_size) != size:
+            raise ValueError(f"map is {size[0]}x{size[1]}, expected {map_size[0]}x{map_size[1]}")
+
+        if turns_left is not None:
+            self.engine.turns_left = turns_left
+        if swing_range is not None:
+            self.engine.swing_range = swing_range
+
+        self.commands_played = 0
+        self.last_action = ""
+
+        # Room class the player's tree came from, None until they get one
+        self.tree_source = None
+
+        # Skip the title screen, like pressing ENTER in GameSession.play()
+        self.map.change_current_room(self.map.home_tile)
+        self.start_turns = self.engine.turns_left
+
+        self.log = None
+        if record is not None:
+            self.log = LogWriter(record, self.seed, self.engine.turns_left,
+                                 self.engine.swing_range, distribution, size)
+
+    def is_over(self):
+        return self.engine.turns_left <= 0
+
+    def step(self, command):
+        """Play a turn with the given command, return the action statement"""
+
+        self.map.enter_room(self.engine)
+
+        had_tree = 'tree' in self.engine.player_inventory
+        room = self.map.current_room
+
+        if self.log is not None:
+            command = self.log.record(command)
+        self.window.next_command = command
+        self.last_action = self.engine.take_action(self.window, self.map)
+        self.commands_played += 1
+
+        if not had_tree and 'tree' in self.engine.player_inventory:
+            self.tree_source = type(room)
+
+        return self.last_action
+
+    def run(self, commands):
+        """Play commands from any iterable of strings, eg. a list or
+        an open file.  Return the outcome.
+        """
+
+        for command in commands:
+            if self.is_over():
+                break
+            self.step(command.rstrip("\n"))
+
+        return self.outcome()
+
+    def ending(self):
+        if self.tree_source is None:
+            return 'bad'
+        elif self.tree_source is not ChristmasTree:
+            return 'arrested'
+        elif self.map.current_tile == self.map.home_tile:
+            return 'best'
+        else:
+            return 'good'
+
+    def outcome(self):
+        """Return a dictionary summarizing the game"""
+
+        outcome = {
+            'seed': self.seed,
+            'commands': self.commands_played,
+            'turns_used': self.start_turns - self.engine.turns_left,
+            'inventory': list(self.engine.player_inventory),
+            'final_room': self.map.current_room.fullname,
+            'final_location': self.map.location(self.map.current_tile),
+            'ending': self.ending()
+            }
+
+        return outcome
+
+
+def run_game(seed, script):
+    """Play one game with the given seed and script, return its outcome"""
+
+    return HeadlessGame(seed).run(script)
+
+
+def run_batch(seeds, scripts):
+    """Play scripts[i] on a map generated from seeds[i].
+    Return a list of outcomes, in the same order.
+    """
+
+    outcomes = []
+
+    for seed, script in zip(seeds, scripts):
+        outcomes.append(run_game(seed, script))
+
+    return outcomes
+
+
+if __name__ == "__main__":
+    # python headless.py SCRIPT [GAMES] - play SCRIPT on GAMES seeds
+    with open(sys.argv[1]) as script_file:
+        script = script_file.read().splitlines()
+
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    instrument.install_from_environment()
+
+    start = time.perf_counter()
+    outcomes = run_batch(range(games), [script] * games)
+    elapsed = time.perf_counter() - start
+
+    if games == 1:
+        print(outcomes[0])
+    print(f"{games} games in {elapsed:.3f}s ({games / elapsed:,.0f} games/s)")
@@ -0,0 +1,237 @@
+"""Timing instrumentation for the stages of a TENENBAUM turn.
+
+install() swaps each stage's function for a wrapper that times every
+call into a Histogram, uninstall() puts the originals back.  Nothing is
+wrapped until install() is called, so a game that isn't being measured
+runs exactly the code it always did.
+
+Set TENENBAUM_PROFILE to turn it on from the command line, eg. for
+main.py, server.py or headless.py:
+
+    TENENBAUM_PROFILE=1 python server.py           summary on exit
+    TENENBAUM_PROFILE=turns.json python main.py    JSON file on exit
+
+STAGES - what can be timed, and where each function lives
+Histogram - call count, total and buckets of latencies
+install() / uninstall() - start and stop timing stages
+reset() - clear every histogram
+export() - the histograms as a dictionary, ready for json
+summary() - the histograms as a table
+install_from_environment() - install, and report on exit, if
+    TENENBAUM_PROFILE is set
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+import read_input
+from main import Engine, Map, Window
+
+# key = stage name, value = (object the function is on, attribute name)
+# take_action includes parse and one of the act_ stages
+STAGES = {
+    'parse': (read_input, 'parse'),
+    'take_action': (Engine, 'take_action'),
+    'act_help': (Engine, 'act_help'),
+    'act_move': (Engine, 'act_move'),
+    'act_take': (Engine, 'act_take'),
+    'act_cut': (Engine, 'act_cut'),
+    'enter_room': (Map, 'enter_room'),
+    'get_story_display': (Engine, 'get_story_display'),
+    'draw': (Window, 'draw')
+    }
+
+ENVIRONMENT_VARIABLE = 'TENENBAUM_PROFILE'
+
+
+def bucket(elapsed):
+    """Return the histogram bucket for a latency in ns.  Every power of
+    two is split in 4 buckets, by the 2 bits after the leading 1, so a
+    bucket's bounds are never more than 25% apart.
+    """
+
+    bits = elapsed.bit_length()
+    if bits <= 3:
+        return elapsed
+
+    return ((bits - 3) << 2) + (elapsed >> (bits - 3))
+
+
+def bucket_limit(index):
+    """Return the largest latency in ns that falls in a bucket"""
+
+    if index < 8:
+        return index
+
+    shift = (index >> 2) - 1
+    return (((index & 3) + 5) << shift) - 1
+
+
+class Histogram(object):
+    """Latencies of one stage, in nanoseconds, counted in buckets so
+    recording a call is one bit_length(), a shift and a few additions.
+
+    record() - add one latency
+    percentile() - upper bound of the bucket holding a percentile
+    """
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = 0
+        self.buckets = [0] * 256
+
+    def record(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.buckets[bucket(elapsed)] += 1
+
+        if elapsed > self.maximum:
+            self.maximum = elapsed
+        if self.minimum is None or elapsed < self.minimum:
+            self.minimum = elapsed
+
+    def percentile(self, fraction):
+        """Return an upper bound in ns for the given fraction of calls,
+        eg. 0.99 for p99.  Never more than the slowest call.
+        """
+
+        if self.count == 0:
+            return 0
+
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(bucket_limit(index), self.maximum)
+
+        return self.maximum
+
+
+# key = stage name, value = Histogram
+HISTOGRAMS = {stage: Histogram() for stage in STAGES}
+
+# key = stage name, value = the function install() replaced
+ORIGINALS = {}
+
+
+def timed(function, histogram):
+    """Return a wrapper around function that records into histogram"""
+
+    clock = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.record(clock() - start)
+
+    return wrapper
+
+
+def install(stages=None):
+    """Start timing the given stage names, every stage by default"""
+
+    for stage in stages or STAGES:
+        if stage in ORIGINALS:
+            continue
+
+        owner, name = STAGES[stage]
+        original = getattr(owner, name)
+        ORIGINALS[stage] = original
+        setattr(owner, name, timed(original, HISTOGRAMS[stage]))
+
+
+def uninstall():
+    """Stop timing every stage, keep what has been recorded"""
+
+    for stage, original in ORIGINALS.items():
+        owner, name = STAGES[stage]
+        setattr(owner, name, original)
+
+    ORIGINALS.clear()
+
+
+def reset():
+    # In place, installed wrappers hold on to their histograms
+    for histogram in HISTOGRAMS.values():
+        histogram.__init__()
+
+
+def export():
+    """Return {stage: statistics} for every stage that was called,
+    times in microseconds, buckets as {upper bound in ns: count}.
+    """
+
+    stages = {}
+
+    for stage, histogram in HISTOGRAMS.items():
+        if histogram.count == 0:
+            continue
+
+        stages[stage] = {
+            'count': histogram.count,
+            'total_us': histogram.total / 1000,
+            'mean_us': histogram.total / histogram.count / 1000,
+            'min_us': histogram.minimum / 1000,
+            'p50_us': histogram.percentile(0.50) / 1000,
+            'p99_us': histogram.percentile(0.99) / 1000,
+            'max_us': histogram.maximum / 1000,
+            'buckets': {bucket_limit(index): count
+                        for index, count in enumerate(histogram.buckets) if count}
+            }
+
+    return stages
+
+
+def summary():
+    """Return a table of every stage that was called, slowest first"""
+
+    stages = export()
+
+    lines = [f"{'stage':18} {'calls':>9} {'total ms':>10} {'mean us':>9}"
+             f" {'p50 us':>9} {'p99 us':>9} {'max us':>9}"]
+
+    for stage, stats in sorted(stages.items(), key=lambda item: -item[1]['total_us']):
+        lines.append(f"{stage:18} {stats['count']:9,} {stats['total_us'] / 1000:10.1f}"
+                     f" {stats['mean_us']:9.1f} {stats['p50_us']:9.1f}"
+                     f" {stats['p99_us']:9.1f} {stats['max_us']:9.1f}")
+
+    return "\n".join(lines)
+
+
+def report(destination):
+    """Write the JSON export to the path destination, or print the
+    summary to stderr if it doesn't end in .json
+    """
+
+    if destination.endswith('.json'):
+        with open(destination, 'w') as report_file:
+            json.dump(export(), report_file, indent=2)
+    else:
+        print(summary(), file=sys.stderr)
+
+
+def install_from_environment():
+    """Install every stage and report on exit, if TENENBAUM_PROFILE
+    is set.  Return True if it was.
+    """
+
+    destination = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not destination:
+        return False
+
+    install()
+    atexit.register(report, destination)
+
+    return True
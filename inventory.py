@@ -0,0 +1,191 @@
+"""Item containers for TENENBAUM.
+
+Items - the player's inventory, or the items in a Room, counted by item
+ItemIndex - which tiles of a world hold each item
+"""
+
+
+class Items(object):
+    """A multiset of item names, eg. 'axe' or 'tree'.  Adding, removing,
+    counting and checking for an item each take one dictionary lookup,
+    however many items there are.
+
+    Iterating gives each item as many times as it is held, items in the
+    order they were first added, so list(items) looks like the list it
+    replaces.
+
+    add() / remove() - one or more of an item
+    count() - how many of an item are held
+    copy() - a new Items with the same counts
+    """
+
+    __slots__ = ('counts', 'size')
+
+    def __init__(self, items=()):
+        # key = item, value = how many, never 0
+        self.counts = counts = {}
+        self.size = 0
+
+        # Most rooms start out empty, and worlds build a lot of rooms
+        if items:
+            for item in items:
+                counts[item] = counts.get(item, 0) + 1
+
+            self.size = sum(counts.values())
+
+    def add(self, item, count=1):
+        self.counts[item] = self.counts.get(item, 0) + count
+        self.size += count
+
+    def remove(self, item, count=1):
+        """Remove count of item, raise ValueError if there are fewer"""
+
+        held = self.counts.get(item, 0)
+        if held < count:
+            raise ValueError(f"{item!r} not held {count} time(s)")
+
+        if held == count:
+            del self.counts[item]
+        else:
+            self.counts[item] = held - count
+        self.size -= count
+
+    def count(self, item):
+        return self.counts.get(item, 0)
+
+    def copy(self):
+        copy = Items()
+        copy.counts = dict(self.counts)
+        copy.size = self.size
+
+        return copy
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def __iter__(self):
+        for item, count in self.counts.items():
+            for each in range(count):
+                yield item
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if isinstance(other, Items):
+            return self.counts == other.counts
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Items({list(self)!r})"
+
+
+class ItemIndex(object):
+    """The tiles of a world that hold each item, for questions like "is
+    there an axe left?" or "where is the nearest tree?" without looking
+    at every Room.  A ChunkedWorld only indexes the chunks generated so
+    far.
+
+    Like a world, an ItemIndex can fork() a copy sharing its sets of
+    tiles, each set copied the first time either copy changes it.
+
+    .tiles - dictionary of sets,
+        key = item,
+        value = set of tile numbers whose Room holds the item
+
+    add_room() - index the items of a Room
+    discard() - a tile no longer holds an item
+    count() - how many tiles hold an item
+    nearest() - closest tile holding an item, by moves on the map
+    """
+
+    def __init__(self):
+        self.tiles = {}
+
+        # items whose sets no other copy shares, None while nothing is shared
+        self.owned = None
+
+    def writable(self, item):
+        """Return the set of tiles holding item, copied first if shared"""
+
+        tiles = self.tiles.get(item)
+
+        if tiles is None:
+            tiles = set()
+            self.tiles[item] = tiles
+            if self.owned is not None:
+                self.owned.add(item)
+
+        elif self.owned is not None and item not in self.owned:
+            tiles = set(tiles)
+            self.tiles[item] = tiles
+            self.owned.add(item)
+
+        return tiles
+
+    def add_room(self, tile, room):
+        for item in room.items.counts:
+            self.writable(item).add(tile)
+
+    def discard(self, item, tile):
+        if tile in self.tiles.get(item, ()):
+            self.writable(item).discard(tile)
+
+    def count(self, item):
+        return len(self.tiles.get(item, ()))
+
+    def nearest(self, item, tile, width, height):
+        """Return the tile holding item closest to tile, counting moves
+        on a height x width map, or None if no tile holds it.  Ties go
+        to the lowest tile number.
+
+        Tiles are checked in rings of growing distance around tile, so
+        a common item is found after a few set lookups.  Once the rings
+        have cost as much as the item has tiles, the rest are scanned.
+        """
+
+        tiles = self.tiles.get(item)
+        if not tiles:
+            return None
+
+        row, column = divmod(tile, width)
+        budget = len(tiles)
+        distance = 0
+
+        while budget > 0 and distance < height + width:
+            # Row by row, left to right, so the first hit is the lowest tile
+            for other_row in range(max(0, row - distance), min(height, row + distance + 1)):
+                offset = distance - abs(other_row - row)
+
+                for other_column in (column - offset, column + offset) if offset else (column,):
+                    if 0 <= other_column < width:
+                        other = other_row * width + other_column
+                        if other in tiles:
+                            return other
+                        budget -= 1
+
+            distance += 1
+
+        # Rare items, far away: cheaper to look at each of them
+        best = None
+        best_distance = None
+
+        for other in tiles:
+            other_row, other_column = divmod(other, width)
+            other_distance = abs(other_row - row) + abs(other_column - column)
+            if best is None or (other_distance, other) < (best_distance, best):
+                best = other
+                best_distance = other_distance
+
+        return best
+
+    def fork(self):
+        """Return a copy of this index, sharing its sets of tiles"""
+
+        copy = ItemIndex()
+        copy.tiles = dict(self.tiles)
+
+        self.owned = set()
+        copy.owned = set()
+
+        return copy
@@ -65,145 +65,152 @@ To-Do:
 """
 
 import os
-import random
+import sys
 import time
 
 import text_display
 import read_input
-from read_input import process
+from gamelog import LogWriter, RecordingWindow
+from inventory import Items
+from rng import Streams
+from terminal import Terminal
+from rooms import RoomRegistry
+from world import ChunkedWorld, FixedWorld
+from visibility import Visibility
 
 INVALID_STATEMENT = "I don't understand -- say something else."
+SUGGESTION_STATEMENT = 'I don\'t understand -- did you mean "{}"?'
+TITLE_PROMPT = "    Press ENTER to start the game! "
 STORY_BOX_WIDTH = 46
+STORY_BOX_HEIGHT = 15
 LINE_BREAK = "-" * STORY_BOX_WIDTH
 EMPTY_LINE = " " * STORY_BOX_WIDTH
+BLANK_PASSAGE = text_display.Passage("", STORY_BOX_WIDTH)
+LINE_BREAK_PASSAGE = text_display.Passage(LINE_BREAK, STORY_BOX_WIDTH)
+
+HELP_SUBTITLE = "This is a text-based adventure!"
+HELP_TEXT = ["""Your mission is to get a tree before Santa
+        arrives at midnight.  Every step you take, every move you
+        make, the clock will tick, so be prudent!  To get around, try
+        entering commands like "Move north!" or "Pick up the axe, dummy!"
+        and see what you're able to do.
+        """]
+
+# Statements for running into a wall/progressing, by direction
+WALL_STATEMENTS = {
+    'n': 'You cannot go any further North!',
+    'e': 'You cannot go any further East!',
+    's': 'You cannot go any further South!',
+    'w': 'You cannot go any further West!'
+    }
+PROGRESS_STATEMENTS = {
+    'n': [
+        "You went North.",
+        "You wandered North.",
+        "You moved onward, to the North."
+        ],
+    'e': [
+        "You went East.",
+        "You wandered East.",
+        "You moved onward, to the East."
+        ],
+    's': [
+        "You went South.",
+        "You wandered South.",
+        "You moved onward, to the South."
+        ],
+    'w': [
+        "You went West."
+        "You wandered West.",
+        "You moved onward, to the West."
+        ]
+    }
+
+# Commands the player can give, see register_command()
+#     key = canonical verb from read_input.lexicon,
+#     value = name of the Engine method that carries it out
+COMMANDS = {
+    'help': 'act_help',
+    'move': 'act_move',
+    'take': 'act_take',
+    'cut': 'act_cut'
+    }
+
+# Room data and descriptions, read from rooms.jsonl as rooms are needed
+ROOMS = RoomRegistry(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rooms.jsonl'),
+    STORY_BOX_WIDTH)
 
 class Engine(object):
     """The Engine runs the game.
 
     .story_display - lines that make up the display within the story box.
+    .story_box - text_display.TextBox holding story_display
+    .streams - random number streams for this game, from the seed
+        'narration' picks flavor text, 'combat' rolls axe swings,
+        'map' is handed to the Map to lay out the rooms
 
-    play() - draw the screen, take input, register updated info
-    take_action() - take processed input, run script based on action
+    take_action() - take processed input, run the COMMANDS handler for
+        its verb
     get_story_display() - set last input and current room description
         to display
+    fork() - copy of the Engine's status, with streams of its own
     """
 
-    def __init__(self):
-        self.player_inventory = []
+    def __init__(self, seed=None, streams=None):
+        self.streams = streams if streams is not None else Streams(seed)
+        self.player_inventory = Items()
         self.turns_left = 20
-        self.story_display = [
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH),
-            text_display.left_align("", STORY_BOX_WIDTH)
-        ]
+        self.swing_range = (2, 5)
+        self.story_box = text_display.TextBox(STORY_BOX_HEIGHT, STORY_BOX_WIDTH)
+        self.story_display = self.story_box.lines
 
-    def play(self, window, map):
-        """Run this as a main loop, collecting input, carrying out actions"""
+    def fork(self):
+        """Return a new Engine with the same inventory, turns_left and
+        swing_range.  Its random streams come from self.streams.fork().
+        """
 
-        # Load current room details
-        map.enter_room(self)
+        copy = Engine(streams=self.streams.fork())
+        copy.player_inventory = self.player_inventory.copy()
+        copy.turns_left = self.turns_left
+        copy.swing_range = self.swing_range
 
-        # Draw the room
-        window.draw(self, map)
-
-        # Take simple input for title screen only, otherwise process it.
-        if map.current_room.nickname == "The Beginning":
-            input("    Press ENTER to start the game! ")
-            map.change_current_room('C3')
-            last_action = "Our story begins..."
-        else:
-            last_action = self.take_action(window, map)
-
-        # Refresh map/display data for next loop
-        map.get_tile_images(self)
-        description = map.current_room.get_description()
-        self.get_story_display(last_action, description)
+        return copy
 
     def act_help(self, window, map, object):
         """Display a help screen, press enter to return to game"""
 
-        help_subtitle = "This is a text-based adventure!"
-
-        help_text = ["""Your mission is to get a tree before Santa
-        arrives at midnight.  Every step you take, every move you
-        make, the clock will tick, so be prudent!  To get around, try
-        entering commands like "Move north!" or "Pick up the axe, dummy!"
-        and see what you're able to do.
-        """]
-
         if object == '':
-            self.get_story_display(help_subtitle, help_text)
+            self.get_story_display(HELP_SUBTITLE, HELP_TEXT)
             window.draw(self, map)
             action_statement = "You're right back in the action!"
         else:
             action_statement = INVALID_STATEMENT
 
-        input("    Press ENTER to return to the game! ")
+        window.pause("    Press ENTER to return to the game! ")
 
         return action_statement
 
     def act_move(self, window, map, direction):
         """change tiles by picking a cardinal directions"""
 
-        # Define statements for running into a wall/progressing
-        wall_statements = {
-            'n': 'You cannot go any further North!',
-            'e': 'You cannot go any further East!',
-            's': 'You cannot go any further South!',
-            'w': 'You cannot go any further West!'
-            }
-        progress_statements = {
-            'n': [
-                "You went North.",
-                "You wandered North.",
-                "You moved onward, to the North."
-                ],
-            'e': [
-                "You went East.",
-                "You wandered East.",
-                "You moved onward, to the East."
-                ],
-            's': [
-                "You went South.",
-                "You wandered South.",
-                "You moved onward, to the South."
-                ],
-            'w': [
-                "You went West."
-                "You wandered West.",
-                "You moved onward, to the West."
-                ]
-            }
-
         # Run if objeect of input is 'n', 's', 'e', or 'w'
-        if direction in progress_statements.keys():
+        if direction in PROGRESS_STATEMENTS:
 
-            # Set the new room based on input's object
-            new_room = map.current_room.neighbors[direction]
+            # Set the new tile based on input's object
+            new_tile = map.neighbor(map.current_tile, direction)
 
-            # mMve to new room if it exists
-            if new_room != None:
-                map.change_current_room(new_room)
+            # Move to new tile if it exists
+            if new_tile != None:
+                map.change_current_room(new_tile)
             else:
-                return wall_statements[direction]
+                return WALL_STATEMENTS[direction]
 
             # Count this as a turn if successful
             self.turns_left -= 1
 
             # Set the statement based on the input's object
-            action_statement = random.choice(progress_statements[direction])
+            action_statement = self.streams.get('narration').choice(PROGRESS_STATEMENTS[direction])
 
         else:
             action_statement = INVALID_STATEMENT
@@ -214,11 +221,15 @@ class Engine(object):
         """Take an item from the room you are in."""
 
         if item in map.current_room.items:
-            # Remove item from room's items list, add to player inventory
-            taken_item = map.current_room.items.pop()
-            self.player_inventory.append(taken_item)
+            # Remove item from room's items, add to player inventory
+            taken_item = map.take_item(item)
+            self.player_inventory.add(taken_item)
             action_statement = f"You took the {taken_item}."
 
+            # Holding the map shows every room on it
+            if taken_item == 'map':
+                map.visibility.reveal_all()
+
             # Count this as a turn if you took an item
             self.turns_left -= 1
         else:
@@ -227,16 +238,18 @@ class Engine(object):
         return action_statement
 
     def act_cut(self, window, map, object):
-        """Cut down the tree, takes 2-5 swings (5 mins/swing)"""
+        """Cut down the tree, takes 2-5 swings (5 mins/swing),
+        or however many the swing_range allows
+        """
 
         requirements_met = 'axe' in self.player_inventory and 'tree' in map.current_room.items
 
         if object == 'tree' and requirements_met:
             # Choose random number of swings it takes to cut tree
-            number_of_swings = random.randint(2,5)
+            number_of_swings = self.streams.get('combat').randint(*self.swing_range)
 
-            felled_tree = map.current_room.items.pop()
-            self.player_inventory.append(felled_tree)
+            felled_tree = map.take_item('tree')
+            self.player_inventory.add(felled_tree)
             action_statement = f"After {number_of_swings} swings of the axe, the tree fell!"
 
             # Count this as a turn per swing
@@ -251,62 +264,73 @@ class Engine(object):
         """from processed input, run scripts based on given verb and object"""
 
         # Get processed input
-        processed_input = process(window.input_char)
+        raw_input = window.read_command(window.input_char)
+        processed_input = read_input.parse(raw_input)
 
         verb = processed_input['verb']
         object = processed_input['object']
 
-        # Check for VALID input
-
-        if verb == 'help':
-            action_statement = self.act_help(window, map, object)
-
-        elif verb == 'move':
-            action_statement = self.act_move(window, map, object)
+        # Check for VALID input, one lookup however many verbs there are
+        handler = COMMANDS.get(verb)
 
-        elif verb == 'take':
-            action_statement = self.act_take(window, map, object)
-
-        elif verb == 'cut':
-            action_statement = self.act_cut(window, map, object)
-
-        else:
+        if handler is None:
             action_statement = INVALID_STATEMENT
+        else:
+            action_statement = getattr(self, handler)(window, map, object)
+
+        # Typos are only acted on in place of a verb, otherwise they are
+        # offered back, which like any invalid command costs no turn
+        if action_statement == INVALID_STATEMENT:
+            suggestion = read_input.suggest(raw_input)
+            if suggestion is not None:
+                action_statement = SUGGESTION_STATEMENT.format(suggestion)
 
         return action_statement
 
     def get_story_display(self, action_statement, description):
         """get summary of last action, followed by room description
-        add any line breaks to separate passages in the description
-        align it left & vertically, assign it to self.story_display
+        add a blank line after each passage in the description
+        fill the story box with it, top aligned, assign its lines
+        to self.story_display
+
+        description is a list of passages, each either a string or
+        a text_display.Passage that was laid out in advance
         """
 
-        story_lines = [
-            text_display.left_align(action_statement, STORY_BOX_WIDTH),
-            EMPTY_LINE,
-            LINE_BREAK,
-            EMPTY_LINE
+        passages = [
+            text_display.Passage(action_statement, STORY_BOX_WIDTH),
+            BLANK_PASSAGE,
+            LINE_BREAK_PASSAGE,
+            BLANK_PASSAGE
             ]
 
-        for p in range(len(description)):
-            passage = description[p]
+        for passage in description:
+            if not isinstance(passage, text_display.Passage):
+                passage = text_display.Passage(passage, STORY_BOX_WIDTH)
 
-            # Using the length of the object, determine wheter str or list
-            # If string, add the line, if list, add each line
-            # This means passages can have more than 7 lines
-            if len(passage) > 7 and len(passage) < 78:
-                story_lines.append(text_display.left_align(passage, STORY_BOX_WIDTH))
-            else:
-                for line in text_display.left_align(passage, STORY_BOX_WIDTH):
-                    story_lines.append(line)
+            passages.append(passage)
+            passages.append(BLANK_PASSAGE)
+
+        self.story_box.fill(passages)
+        self.story_display = self.story_box.lines
 
-            story_lines.append(text_display.left_align('', STORY_BOX_WIDTH))
+        return None
 
-        all_lines = text_display.vert_align(story_lines, STORY_BOX_WIDTH, 15)
 
-        self.story_display = all_lines
+def register_command(verb, handler, synonyms=()):
+    """Let the player give a new command, eg. a mini-game for one room.
 
-        return None
+    verb becomes a verb in read_input.lexicon, along with any synonyms,
+    and handler(engine, window, map, object) becomes Engine.act_<verb>,
+    returning the action statement.  Registering a verb again replaces
+    its handler and adds the synonyms.
+    """
+
+    name = 'act_' + verb
+    setattr(Engine, name, handler)
+    COMMANDS[verb] = name
+
+    read_input.add_words('verbs', verb, synonyms)
 
 
 class Window(object):
@@ -314,22 +338,26 @@ class Window(object):
         as well as the visuals for the game's display.
     """
 
-    def __init__(self, height, width, font_size):
-        """height and width are defined by number of characters"""
+    def __init__(self, height, width, font_size, stream=None):
+        """height and width are defined by number of characters,
+        frames are written to stream, stdout by default
+        """
         self.height = height
         self.width = width
         self.font_size = font_size
         self.input_char = "    > "
+        self.terminal = Terminal(height, width, font_size, stream)
 
     def draw(self, engine, map):
         """Print the game screen according to status of given map,
             at the time the function was called on Window.
+            Only the parts that changed since the last draw are printed.
         """
 
-        # Set Terminal window parameters
-        os.system('osascript -e \'tell app "System Events" to tell process "Terminal" to set frontmost to true\'')
-        os.system(f'osascript -e \'tell app "Terminal" to set font size of first window to "{self.font_size}"\'')
-        os.system(f'printf "\e[8;{self.height};{self.width}t"')
+        self.terminal.write_frame(self.build_frame(engine, map))
+
+    def build_frame(self, engine, map):
+        """Return the game screen as a list of lines"""
 
         # Set time of day, as displayed on screen
         times_of_day = [
@@ -339,14 +367,22 @@ class Window(object):
         '11:30 PM','11:35 PM','11:40 PM','11:45 PM','11:50 PM','11:55 PM',
         'MIDNIGHT'
         ]
-        time_of_day = text_display.center(times_of_day[20 - engine.turns_left], 8)
+        # Past midnight is still midnight, a last swing can overshoot it
+        hour = max(0, min(20 - engine.turns_left, len(times_of_day) - 1))
+        time_of_day = text_display.layout(times_of_day[hour], 8, 'center')
 
-        # Temporarily set brackets around the current room's map_image
-        for location in map.tile_images:
-            if map.tiles[location].room == map.current_room:
-                map.tile_images[location] = '[' + map.tile_images[location][1] + ']'
-            else:
-                pass
+        # Map images for the 5x5 tiles shown on screen, blank off the map
+        top, left = map.viewport(5, 5)
+        tile_images = map.view()
+        images = []
+
+        for row in range(top, top + 5):
+            for column in range(left, left + 5):
+                if row >= map.height or column >= map.width:
+                    images.append('   ')
+                    continue
+
+                images.append(tile_images[row * map.width + column])
 
         game_screen = """
             .------------------------------------------------.
@@ -369,279 +405,297 @@ class Window(object):
             | {} |           {}
             '------------------------------------------------'
         """.format(
-            text_display.center(map.current_room.fullname, STORY_BOX_WIDTH),
+            text_display.layout(map.current_room.fullname, STORY_BOX_WIDTH, 'center'),
             EMPTY_LINE,
-                map.tile_images['A1'], map.tile_images['A2'],
-                map.tile_images['A3'], map.tile_images['A4'],
-                map.tile_images['A5'],
+                images[0], images[1],
+                images[2], images[3],
+                images[4],
             engine.story_display[0],
             engine.story_display[1],
-                map.tile_images['B1'], map.tile_images['B2'],
-                map.tile_images['B3'], map.tile_images['B4'],
-                map.tile_images['B5'],
+                images[5], images[6],
+                images[7], images[8],
+                images[9],
             engine.story_display[2],
             engine.story_display[3],
-                map.tile_images['C1'], map.tile_images['C2'],
-                map.tile_images['C3'], map.tile_images['C4'],
-                map.tile_images['C5'],
+                images[10], images[11],
+                images[12], images[13],
+                images[14],
             engine.story_display[4],
             engine.story_display[5],
-                map.tile_images['D1'], map.tile_images['D2'],
-                map.tile_images['D3'], map.tile_images['D4'],
-                map.tile_images['D5'],
+                images[15], images[16],
+                images[17], images[18],
+                images[19],
             engine.story_display[6],
             engine.story_display[7],
-                map.tile_images['E1'], map.tile_images['E2'],
-                map.tile_images['E3'], map.tile_images['E4'],
-                map.tile_images['E5'],
+                images[20], images[21],
+                images[22], images[23],
+                images[24],
             engine.story_display[8],
             engine.story_display[9],
             engine.story_display[10],
             engine.story_display[11],
-                text_display.center(map.current_room.nickname, 18),
+                text_display.layout(map.current_room.nickname, 18, 'center'),
             engine.story_display[12],
             engine.story_display[13],
             engine.story_display[14],
                 time_of_day
         )
 
-        # Clear screen, print window
-        self.clear()
-
-        for line in game_screen.split('\n'):
-            # Compensate for indentation in game_screen
-            print(line[8:])
+        # Compensate for indentation in game_screen
+        lines = [line[8:] for line in game_screen.split('\n')]
 
-        # Reset current room's map image, without brackets
-        for location in map.tile_images:
-            if map.tiles[location].room == map.current_room:
-                map.tile_images[location] = ' ' + map.tile_images[location][1] + ' '
-            else:
-                pass
+        return lines
 
     def clear(self):
-        os.system('clear')
+        self.terminal.clear()
+
+    def read_command(self, prompt):
+        """Return the next line typed by the player"""
+        return input(prompt)
+
+    def pause(self, prompt):
+        """Wait for the player to press ENTER"""
+        input(prompt)
 
 
 class Map(object):
     """The Map contains information about the organization of Rooms
         and Tiles.
+
+    Tiles are numbered row by row from the top left corner, so on a 5x5
+    map tile A1 is 0, A2 is 1, B1 is 5 and the center tile C3 is 12.
+
+    Without a distribution, the Map is filled with every room in
+    ROOM_IDS, shuffled.  With a distribution of (room id, weight)
+    pairs, the Map is a ChunkedWorld generated from the seed, and rooms
+    are only built for the parts of the world shown on screen.
+
+    new_map() - build the world that holds a Room for each tile
+    neighbor() - number of the tile next to a tile, or None at the edge
+    location() / tile_number() - convert between tile numbers and 'A1'
+    viewport() - top left tile of the part of the map shown on screen
+    load_view() - make sure every tile in the viewport has a Room
+    view() - read-only tile images for the screen
+    get_tile_images() - work out visibility again from the whole world
+    edit_current_room() - current room, safe to change after a fork()
+    take_item() - remove an item from the current room
+    fork() - copy of the Map sharing its Rooms, copied on first change
     """
 
-    def __init__(self, current_room, engine):
+    def __init__(self, current_room, engine, height=5, width=5,
+                 distribution=None, seed=None, rng=None):
+
+        # random stream for laying out rooms, the Engine's by default
+        self.rng = rng if rng is not None else engine.streams.get('map')
 
         self.current_room = current_room
+        self.height = height
+        self.width = width
+        self.distribution = distribution
+        self.seed = seed
 
-        # dictionary of map rooms
-        #     key = Tile.room.location,
-        #     value = Tile.room
+        # tile number of current_room, None while it is off the map
+        self.current_tile = None
+
+        # House is in the center tile
+        self.home_tile = home_tile(height, width)
+
+        # world of map rooms, a FixedWorld or ChunkedWorld
+        #     index = tile number,
+        #     value = Room on that tile
         self.tiles = self.new_map()
 
-        # dictionary of map tile images,
-        #     key = Tile.room.location,
-        #     value = Tile.room.map_image OR "###" if not yet visited
-        self.tile_images = self.get_tile_images(engine)
+        # which tiles show their Room.map_image, the rest show "###",
+        # nothing is revealed yet since every Room is new
+        self.visibility = Visibility(self.tiles, 'map' in engine.player_inventory)
+        self.load_view(engine)
 
     def new_map(self):
-        """Generate a list of Tiles, A1-E5.
-        Put the House in the center tile, C3.
-        Populate the tiles randomly from list of rooms.
+        """Generate the world of Rooms, one per tile.
+        Put the House in the center tile.
+
+        Without a distribution, populate the other tiles randomly from
+        ROOM_IDS, using as many copies as it takes to fill the map.
+        With one, leave the tiles to a ChunkedWorld to fill as needed.
         """
 
-        map_tiles = {
-        'A1': Tile(
-            'A1',
-            {'n': None, 'e': 'A2', 's': 'B1', 'w': None},
-            None),
-        'A2': Tile(
-            'A2',
-            {'n': None, 'e': 'A3', 's': 'B2', 'w': 'A1'},
-            None),
-        'A3': Tile(
-            'A3',
-            {'n': None, 'e': 'A4', 's': 'B3', 'w': 'A2'},
-            None),
-        'A4': Tile(
-            'A4',
-            {'n': None, 'e': 'A5', 's': 'B4', 'w': 'A3'},
-            None),
-        'A5': Tile(
-            'A5',
-            {'n': None, 'e': None, 's': 'B5', 'w': 'A4'},
-            None),
-        'B1': Tile(
-            'B1',
-            {'n': 'A1', 'e': 'B2', 's': 'C1', 'w': None},
-            None),
-        'B2': Tile(
-            'B2',
-            {'n': 'A2', 'e': 'B3', 's': 'C2', 'w': 'B1'},
-            None),
-        'B3': Tile(
-            'B3',
-            {'n': 'A3', 'e': 'B4', 's': 'C3', 'w': 'B2'},
-            None),
-        'B4': Tile(
-            'B4',
-            {'n': 'A4', 'e': 'B5', 's': 'C4', 'w': 'B3'},
-            None),
-        'B5': Tile(
-            'B5',
-            {'n': 'A5', 'e': None, 's': 'C5', 'w': 'B4'},
-            None),
-        'C1': Tile(
-            'C1',
-            {'n': 'B1', 'e': 'C2', 's': 'D1', 'w': None},
-            None),
-        'C2': Tile(
-            'C2',
-            {'n': 'B2', 'e': 'C3', 's': 'D2', 'w': 'C1'},
-            None),
-        'C3': Tile(
-            'C3',
-            {'n': 'B3', 'e': 'C4', 's': 'D3', 'w': 'C2'},
-            None),
-        'C4': Tile(
-            'C4',
-            {'n': 'B4', 'e': 'C5', 's': 'D4', 'w': 'C3'},
-            None),
-        'C5': Tile(
-            'C5',
-            {'n': 'B5', 'e': None, 's': 'D5', 'w': 'C4'},
-            None),
-        'D1': Tile(
-            'D1',
-            {'n': 'C1', 'e': 'D2', 's': 'E1', 'w': None},
-            None),
-        'D2': Tile(
-            'D2',
-            {'n': 'C2', 'e': 'D3', 's': 'E2', 'w': 'D1'},
-            None),
-        'D3': Tile(
-            'D3',
-            {'n': 'C3', 'e': 'D4', 's': 'E3', 'w': 'D2'},
-            None),
-        'D4': Tile(
-            'D4',
-            {'n': 'C4', 'e': 'D5', 's': 'E4', 'w': 'D3'},
-            None),
-        'D5': Tile(
-            'D5',
-            {'n': 'C5', 'e': None, 's': 'E5', 'w': 'D4'},
-            None),
-        'E1': Tile(
-            'E1',
-            {'n': 'D1', 'e': 'E2', 's': None, 'w': None},
-            None),
-        'E2': Tile(
-            'E2',
-            {'n': 'D2', 'e': 'E3', 's': None, 'w': 'E1'},
-            None),
-        'E3': Tile(
-            'E3',
-            {'n': 'D3', 'e': 'E4', 's': None, 'w': 'E2'},
-            None),
-        'E4': Tile(
-            'E4',
-            {'n': 'D4', 'e': 'E5', 's': None, 'w': 'E3'},
-            None),
-        'E5': Tile(
-            'E5',
-            {'n': 'D5', 'e': None, 's': None, 'w': 'E4'},
-            None)
-        }
-
-        # Set middle tile to House
-        map_tiles['C3'].room = House('My House', 'A Lovely Little House', ' H ', ['Something!'])
-
-        # Set rest of tiles to a random room
-        map_rooms = [
-            Shed('Old Shed', 'Old Shed Full of Machinery', ' S ', ['axe']),
-            Barn('Red Barn', 'Giant Red Barn', ' B ', ['map']),
-            FrozenPond('Frozen Pond', 'Deep Pond, Frozen Solid', ' P ', []),
-            Snowman("Snowman's Land", 'A Snowman Stands Before You', ' 8 ', []),
-            NeighborTree("A Tree", "A Tree, Just Beyond a Fence", ' T ', ['tree']),
-            NeighborTree("A Tree", "A Tree, Just Beyond a Fence", ' T ', ['tree']),
-            ChristmasTree("A Tree", "A Stunning Pine Tree", ' T ', ['tree']),
-            ChristmasTree("A Tree", "A Beautiful Pine Tree", ' T ', ['tree']),
-            ChristmasTree("A Tree", "A Gorgeous Pine Tree", ' T ', ['tree']),
-            WillowTree("A Tree", "An Enormous Willow Tree", ' W ', ['tree']),
-            FillerRoom("A Hillside", "A Snow-Covered Hill", '   ', []),
-            FillerRoom("A Hillside", "A Rocky Hill", '   ', []),
-            FillerRoom("A Forest", "A Deep Forest of Birch and Oak", '   ', []),
-            FillerRoom("A Forest", "A Sparse Patch of Elms", '   ', []),
-            FillerRoom("A Trail", "A Gravel Road", '   ', []),
-            FillerRoom("A Trail", "A Shallow Path Through The Snow", '   ', []),
-            FillerRoom("A Garden", "A Quiet Garden Blanketed In Snow", '   ', []),
-            FillerRoom("A Garden", "A Neighbor's Garden", '   ', []),
-            FillerRoom("A Field", "A Field Of Wildflowers", '   ', []),
-            FillerRoom("A Field", "An Abandoned Corn Field", '   ', []),
-            FillerRoom("A Junkyard", "Heaps Of Junk, Whitewashed In The Snow", '   ', []),
-            FillerRoom("A Dirt Road", "A Tunnel Of Branches Over A Dirt Road", '   ', []),
-            FillerRoom("A Treehouse", "Your Childhood Treehouse", '   ', []),
-            FillerRoom("A Bench", "Wooden Bench, Overlooking A Hill", '   ', [])
-        ]
-        for tile in map_tiles:
+        if self.distribution is not None:
+            seed = self.seed if self.seed is not None else self.rng.getrandbits(64)
 
-            # Skip any tiles already containing a room
-            if map_tiles[tile].room == None:
-                random_room = map_rooms.pop(random.randint(0, len(map_rooms) - 1))
+            return ChunkedWorld(self.height, self.width, self.distribution, seed,
+                                new_room, self.home_tile, HOME_ROOM_ID)
 
-                # Assign room's neighbors to assigned tile's neighbors
-                random_room.neighbors = map_tiles[tile].neighbors
+        layout = map_layout(self.rng, self.height, self.width)
 
-                # Assign tile's room to room
-                map_tiles[tile].room = random_room
-            else:
-                pass
+        # Rooms are only copied once the player changes them
+        return FixedWorld([shared_room(room_id) for room_id in layout],
+                          self.height, self.width, shared=True)
+
+    def neighbor(self, tile, direction):
+        """Return the number of the tile next to the given tile in the
+        direction 'n', 'e', 's' or 'w', or None if it is off the map.
+        """
+
+        width = self.width
+
+        if direction == 'n':
+            if tile >= width:
+                return tile - width
+        elif direction == 's':
+            if tile < (self.height - 1) * width:
+                return tile + width
+        elif direction == 'e':
+            if tile % width != width - 1:
+                return tile + 1
+        elif direction == 'w':
+            if tile % width != 0:
+                return tile - 1
+
+        return None
+
+    def location(self, tile):
+        """Return the name of a tile: row letter(s), then column number.
+        Rows past Z carry on as AA, AB, ..., like spreadsheet columns.
+        """
+
+        row, column = divmod(tile, self.width)
+
+        letters = ""
+        row += 1
+        while row > 0:
+            row, letter = divmod(row - 1, 26)
+            letters = chr(ord('A') + letter) + letters
+
+        return f"{letters}{column + 1}"
+
+    def tile_number(self, location):
+        """Return the tile number for a name like 'C3'"""
+
+        letters = location.rstrip("0123456789")
+
+        row = 0
+        for letter in letters:
+            row = row * 26 + (ord(letter) - ord('A') + 1)
 
-        return map_tiles
+        return (row - 1) * self.width + int(location[len(letters):]) - 1
+
+    def viewport(self, height, width):
+        """Return (top row, left column) of a height x width window onto
+        the map, centered on the current tile where the edges allow,
+        or on the House while the current room is off the map.
+        """
+
+        tile = self.current_tile if self.current_tile is not None else self.home_tile
+        row, column = divmod(tile, self.width)
+
+        top = max(0, min(row - height // 2, self.height - height))
+        left = max(0, min(column - width // 2, self.width - width))
+
+        return (top, left)
+
+    def load_view(self, engine):
+        """Have the world build any Rooms in the 5x5 viewport that do
+        not exist yet.  New Rooms are unvisited, so they start hidden.
+        """
+
+        top, left = self.viewport(5, 5)
+        self.tiles.load_region(top, left, 5, 5)
+
+    def view(self):
+        """Return the tile images to draw, by tile number, with brackets
+        around the current room's map_image
+        """
+
+        return self.visibility.view(self.current_tile)
 
     def enter_room(self, engine):
         """Set relevant variables to new values, given the new room
         you are entering.
         """
-        self.current_room.times_visited += 1
-        self.get_tile_images(engine)
+        self.edit_current_room().times_visited += 1
+
+        # Only this tile's image can change by visiting it.  A FixedWorld
+        # has every Room already, only a ChunkedWorld may have to load some.
+        if self.current_tile is not None:
+            if self.distribution is not None:
+                self.load_view(engine)
+            self.visibility.reveal(self.current_tile)
 
     def get_tile_images(self, engine):
-        """Get the image for each tile, based on # of times visited"""
+        """Work out which tiles are visible from scratch, based on # of
+        times visited, eg. after the world was restored from a snapshot.
+        Return the image for each tile that has a Room so far.
+        """
 
-        tile_images = {}
+        visibility = self.visibility
+        visibility.rebuild(self.tiles, 'map' in engine.player_inventory)
 
-        # Hide tile's map image if has not yet been visited
-        for tile in self.tiles:
+        return {tile: visibility.image(tile) for tile, room in self.tiles.loaded()}
 
-            first_time = self.tiles[tile].room.times_visited == 0
-            no_map = 'map' not in engine.player_inventory
+    def change_current_room(self, new_tile):
+        self.current_tile = new_tile
+        self.current_room = self.tiles[new_tile]
 
-            if first_time and no_map:
-                tile_images[tile] = "###"
+    def edit_current_room(self):
+        """Return the current room, ready to be changed.
+        After a fork() it may be a copy of the Room it was before.
+        """
 
-            else:
-                tile_images[tile] = self.tiles[tile].room.map_image
+        if self.current_tile is not None:
+            self.current_room = self.tiles.writable(self.current_tile)
+
+        return self.current_room
+
+    def take_item(self, item):
+        """Remove one of item from the current room and return it,
+        keeping the world's item index up to date
+        """
+
+        items = self.edit_current_room().items
+        items.remove(item)
+
+        if self.current_tile is not None and item not in items:
+            self.tiles.item_index.discard(item, self.current_tile)
+
+        return item
+
+    def fork(self):
+        """Return a copy of this Map that shares its Rooms until either
+        copy changes one of them.
+        """
+
+        copy = Map.__new__(Map)
+        copy.__dict__.update(self.__dict__)
+        copy.tiles = self.tiles.fork()
+        copy.visibility = self.visibility.fork(copy.tiles)
 
-        self.tile_images = tile_images
+        return copy
 
-        return tile_images
 
-    def change_current_room(self, new_room_location):
-        self.current_room = self.tiles[new_room_location].room
-        self.current_room.neighbors = self.tiles[new_room_location].neighbors
+def home_tile(height, width):
+    """Return the tile number of the House, the center of the map"""
 
+    return (height // 2) * width + (width // 2)
 
-class Tile(object):
-    """A Tile has:
-        .location - coordinates, eg. 'A1'
-        .neighbors - dictionary, keys 'n', 'e', 's', 'w', vals 'A1'...
-        .room - assigned during new_map(), Room object
+
+def map_layout(rng, height, width):
+    """Return the room ids of a height x width map without a
+    distribution, in tile order: the House on home_tile(), the other
+    tiles shuffled by rng from as many copies of ROOM_IDS as it takes.
     """
 
+    tile_count = height * width
+
+    room_ids = []
+    while len(room_ids) < tile_count - 1:
+        room_ids.extend(ROOM_IDS)
+
+    rng.shuffle(room_ids)
+
+    layout = room_ids[:tile_count - 1]
+    layout.insert(home_tile(height, width), HOME_ROOM_ID)
 
-    def __init__(self, location, neighbors, room):
-        self.location = location
-        self.neighbors = neighbors
-        self.room = room
+    return layout
 
 
 class Room(object):
@@ -649,236 +703,275 @@ class Room(object):
         .nickname - appears under '-- LOCATION --'
         .fullname - appears at the top of story box
         .map_image - three character display for map
-        .description - based on current status, description of room
-        .neighbors - dictionary of neighboring tiles, assigned
-            during Map.new_map()
+        .items - Items in the room, see inventory.py
         .times_visited - increments everytime you enter the room
+        .room_id - id of the room in the room registry, ROOMS
+
+    Large maps hold a lot of rooms, so Room and every subclass
+    use __slots__ instead of an instance dictionary.
     """
 
-    def __init__(self, nickname, fullname, map_image, items):
+    __slots__ = ('times_visited', 'nickname', 'fullname', 'map_image', 'items', 'room_id')
+
+    def __init__(self, nickname, fullname, map_image, items, room_id=None):
         self.times_visited = 0
         self.nickname = nickname
         self.fullname = fullname
         self.map_image = map_image
-        self.neighbors = {}
         self.items = items
-        self.description = self.get_description()
+        self.room_id = room_id
+
+    def copy(self):
+        """Return a new Room of the same class, with the same status"""
+
+        room = self.__class__.__new__(self.__class__)
+        room.times_visited = self.times_visited
+        room.nickname = self.nickname
+        room.fullname = self.fullname
+        room.map_image = self.map_image
+        room.items = self.items.copy()
+        room.room_id = self.room_id
+
+        return room
+
+    def get_description(self, session):
+        """Get description based on the status of the GameSession"""
+
+        ## OVERRIDE CODE HERE TO PASS IN ANY OTHER STATUS THE ROOM NEEDS
+        return self.registry_description(())
+
+    def registry_description(self, inventory):
+        """Look up the description in the room registry, given the
+        player's inventory.  Rooms without one get a placeholder.
+        """
 
-    def get_description(self):
-        """Get description based on Map status"""
+        description = None
 
-        ## OVERRIDE CODE HERE TO DEFINE SPECIFIC TRIGGERS
-        description = [
-            """This Room is Not Configured Yet.""",
-            """It must be at least two lines long, and even more preferable
-            for testing, if it has at least one fairly long line.
-            """]
+        if self.room_id is not None:
+            description = ROOMS.describe(self.room_id, self.times_visited, inventory)
+
+        if description is None:
+            description = [
+                """This Room is Not Configured Yet.""",
+                """It must be at least two lines long, and even more preferable
+                for testing, if it has at least one fairly long line.
+                """]
 
         return description
 
 
 class House(Room):
 
-    def get_description(self):
+    __slots__ = ()
 
-        first_time_desc = [
-            """Christmas is your favorite holiday. You especially love
-            hanging ornaments on the --""",
-            """-- THE TREE! You forgot to get a tree! And only
-            two hours until Christmas! Better get one
-            before Santa comes!""",
-            EMPTY_LINE,
-            """Enter a command, or 'help' to learn more."""
-            ]
+    def get_description(self, session):
 
-        normal_desc = [
-            """This is your house! My, it's lovely."""
-            ]
+        return self.registry_description(session.engine.player_inventory)
 
-        success_desc = [
+class Shed(Room):
 
-            ]
+    __slots__ = ()
 
-        if self.times_visited == 0:
-            description = first_time_desc
+class Barn(Room):
 
-        elif 'tree' not in main_engine.player_inventory:
-            description = normal_desc
+    __slots__ = ()
 
-        else:
-            description = success_desc
+class FrozenPond(Room):
 
-        return description
+    __slots__ = ()
 
-class Shed(Room):
+class Snowman(Room):
 
-    def get_description(self):
+    __slots__ = ()
 
-        description = [
-            """This is the shed."""
-            ]
+class NeighborTree(Room):
 
-        return description
+    __slots__ = ()
 
-class Barn(Room):
+class ChristmasTree(Room):
 
-    def get_description(self):
+    __slots__ = ()
 
-        description = [
-            """This is the barn."""
-            ]
+class WillowTree(Room):
 
-        return description
+    __slots__ = ()
 
-class FrozenPond(Room):
+class FillerRoom(Room):
 
-    def get_description(self):
+    __slots__ = ()
 
-        description = [
-            """This is the frozen pond."""
-            ]
 
-        return description
+class MidnightScreen(Room):
 
-class Snowman(Room):
+    __slots__ = ()
 
-    def get_description(self):
+class TitleScreen(Room):
 
-        description = [
-            """This is the snowman's land."""
-            ]
+    __slots__ = ()
 
-        return description
+    def get_description(self, session):
 
-class NeighborTree(Room):
+        self.times_visited = 1
 
-    def get_description(self):
+        return Room.get_description(self, session)
 
-        description = [
-            """This is a neighbor's tree."""
-            ]
 
-        return description
+def new_room(room_id):
+    """Return a new Room, built from its record in the room registry"""
 
-class ChristmasTree(Room):
+    template = ROOM_TEMPLATES.get(room_id)
 
-    def get_description(self):
+    if template is None:
+        record = ROOMS.get(room_id)
+        template = (ROOM_CLASSES[record.room_class], record.nickname,
+                    record.fullname, record.map_image, record.items)
+        ROOM_TEMPLATES[room_id] = template
 
-        description = [
-            """This is a proper Christmas tree!"""
-            ]
+    room_class, nickname, fullname, map_image, items = template
 
-        return description
+    return room_class(nickname, fullname, map_image, Items(items), room_id)
 
-class WillowTree(Room):
 
-    def get_description(self):
+def shared_room(room_id):
+    """Return the Room for room_id that new worlds share, see FixedWorld.
+    It must never be changed, only copied.
+    """
 
-        description = [
-            """This is a beautiful willow tree."""
-            ]
+    room = SHARED_ROOMS.get(room_id)
 
-        return description
+    if room is None:
+        room = SHARED_ROOMS[room_id] = new_room(room_id)
 
-class FillerRoom(Room):
+    return room
 
-    def get_description(self):
 
-        if self.fullname == "A Snow-Covered Hill":
-            description = [
-            """Enter description here."""
-            ]
+# What new_room() needs from each record, so building a world's worth
+# of Rooms doesn't look each one up again
+#     key = room id,
+#     value = (Room class, nickname, fullname, map_image, items)
+ROOM_TEMPLATES = {}
 
-        elif self.fullname == "A Rocky Hill":
-            description = [
-            """Enter description here."""
-            ]
+# Unchanged Rooms, one per room id, for shared_room()
+SHARED_ROOMS = {}
 
-        elif self.fullname == "A Deep Forest of Birch and Oak":
-            description = [
-            """Enter description here."""
-            ]
 
-        elif self.fullname == "A Sparse Patch of Elms":
-            description = [
-            """Enter description here."""
-            ]
+ROOM_CLASSES = {
+    room_class.__name__: room_class for room_class in (
+        Room, House, Shed, Barn, FrozenPond, Snowman, NeighborTree,
+        ChristmasTree, WillowTree, FillerRoom, MidnightScreen, TitleScreen)
+    }
 
-        elif self.fullname == "A Gravel Road":
-            description = [
-            """Enter description here."""
-            ]
+# Ids of every room that can appear on the map, except for the House
+HOME_ROOM_ID = 'house'
+ROOM_IDS = [
+    'shed', 'barn', 'frozen_pond', 'snowman',
+    'neighbor_tree', 'neighbor_tree',
+    'stunning_pine', 'beautiful_pine', 'gorgeous_pine', 'willow_tree',
+    'snow_covered_hill', 'rocky_hill', 'birch_forest', 'elm_patch',
+    'gravel_road', 'snow_path', 'quiet_garden', 'neighbors_garden',
+    'wildflower_field', 'corn_field', 'junkyard', 'dirt_road',
+    'treehouse', 'bench'
+]
 
-        elif self.fullname == "A Shallow Path Through The Snow":
-            description = [
-            """Enter description here."""
-            ]
+# Distribution for generated worlds, same odds as the list of rooms
+ROOM_DISTRIBUTION = [(room_id, 1) for room_id in ROOM_IDS]
 
-        elif self.fullname == "A Quiet Garden Blanketed In Snow":
-            description = [
-            """Enter description here."""
-            ]
 
-        elif self.fullname == "A Neighbor's Garden":
-            description = [
-            """Enter description here."""
-            ]
 
-        elif self.fullname == "A Field Of Wildflowers":
-            description = [
-            """Enter description here."""
-            ]
+class GameSession(object):
+    """One game: its Engine, its Map, and the Window it is played in.
+    Rooms get the session when asked for a description, so they see
+    the state of their own game, and any number of sessions can run
+    side by side.
 
-        elif self.fullname == "An Abandoned Corn Field":
-            description = [
-            """Enter description here."""
-            ]
+    play() - run this as a main loop, one turn per call
+    start_turn() - enter the current room and draw the screen
+    finish_turn() - update the screen's data after an action
+    is_over() - True once the clock strikes midnight
+    end() - move to the midnight screen
 
-        elif self.fullname == "Heaps Of Junk, Whitewashed In The Snow":
-            description = [
-            """Enter description here."""
-            ]
+    Without a window, the game is played in a Window on the Terminal.
+    seed and distribution are handed to the Engine and the Map.
+    """
 
-        elif self.fullname == "A Tunnel Of Branches Over A Dirt Road":
-            description = [
-            """Enter description here."""
-            ]
+    def __init__(self, seed=None, window=None, distribution=None):
+        self.engine = Engine(seed)
+        self.map = Map(new_room('title_screen'), self.engine, distribution=distribution)
+        self.window = window if window is not None else Window(23, 84, 28)
 
-        elif self.fullname == "Your Childhood Treehouse":
-            description = [
-            """Enter description here."""
-            ]
+    def play(self):
+        """Draw the screen, take input, register updated info"""
 
-        elif self.fullname == "Wooden Bench, Overlooking A Hill":
-            description = [
-            """Enter description here."""
-            ]
+        engine = self.engine
+        map = self.map
+        window = self.window
 
-        return description
+        self.start_turn()
 
+        # Take simple input for title screen only, otherwise process it.
+        if map.current_room.nickname == "The Beginning":
+            window.pause(TITLE_PROMPT)
+            map.change_current_room(map.home_tile)
+            last_action = "Our story begins..."
+        else:
+            last_action = engine.take_action(window, map)
 
-class MidnightScreen(Room):
-    pass
+        self.finish_turn(last_action)
 
-class TitleScreen(Room):
+    def start_turn(self):
+        # Load current room details, then draw the room
+        self.map.enter_room(self.engine)
+        self.window.draw(self.engine, self.map)
 
-    def get_description(self):
+    def finish_turn(self, last_action):
+        # Refresh display data for next turn
+        description = self.map.current_room.get_description(self)
+        self.engine.get_story_display(last_action, description)
 
-        self.times_visited = 1
+    def is_over(self):
+        return self.engine.turns_left <= 0
 
-        description = [
-            """This is the title screen"""
-            ]
+    def end(self, last_action):
+        """Leave the map for the midnight screen, and draw it"""
 
-        return description
+        map = self.map
+        map.current_tile = None
+        map.current_room = new_room('midnight_screen')
 
-# INITIALIZE VARIABLES
-main_engine = Engine()
-main_window = Window(23, 84, 28)
-title_screen = TitleScreen("The Beginning", "TENENBAUM: THE GAME", '   ', [])
-midnight_screen = MidnightScreen('Midnight', "Christmas Morning", '   ', [])
-main_map = Map(title_screen, main_engine)
+        self.engine.get_story_display(last_action, map.current_room.get_description(self))
+        self.window.draw(self.engine, map)
+
+
+def main(argv=None):
+    """python main.py [LOG] - play, recording every command to LOG,
+    see replay.py.  Set TENENBAUM_PROFILE to time each stage of a turn,
+    see instrument.py.
+    """
 
-# MAIN LOOP
-while True:
-    main_engine.play(main_window, main_map)
+    # instrument.py wraps this module's classes, so it can't be
+    # imported before they exist
+    import instrument
+    instrument.install_from_environment()
+
+    argv = sys.argv[1:] if argv is None else argv
+    session = GameSession()
+
+    if argv:
+        engine = session.engine
+        try:
+            log = LogWriter(argv[0], engine.streams.seed, engine.turns_left,
+                            engine.swing_range, session.map.distribution,
+                            (session.map.height, session.map.width))
+        except ValueError as error:
+            sys.exit(str(error))
+        session.window = RecordingWindow(session.window, log)
+
+    while True:
+        session.play()
+
+
+if __name__ == "__main__":
+    # Play with the main module every other module imports, rather than
+    # this copy of it, so they all share the same classes
+    from main import main as play_game
+    play_game()
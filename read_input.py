@@ -1,9 +1,25 @@
 """Function to process input in TENENBAUM
 
 lexicon - list of identifiable verbs and objects, with synonyms
-process() - scan input for verbs and objects, return last pair found
+word_index - lexicon flattened to word: (word type, canonical word)
+add_words() - teach the lexicon a new verb or object, or more synonyms
+edit_distance() - typos between two words, counting swapped neighbours as one
+is_swap() - True if two words differ by two neighbours swapped
+fuzzy_match() - the lexicon word a misspelled word is closest to
+set_fuzzy_distance() - change how many typos fuzzy_match() forgives
+normalize() - lowercase a line of text, special chars become spaces
+tokenize() - normalize a line of text and split it into words
+parse() - scan a line of text for verbs and objects, return last pair found
+parse_normalized() - parse() an already normalized line, return a tuple
+suggest() - a line with its typos corrected, to ask "Did you mean ...?"
+process() - read a line of input from the player, then parse() it
+parse_many() - parse() a list or stream of lines, through a memoized cache
+set_parse_cache_size() - change how many lines parse_many() remembers
+parse_cache_info() - hits, misses, maxsize and currsize of that cache
 """
 
+import functools
+
 lexicon = {
     'verbs':
         {
@@ -24,40 +40,331 @@ lexicon = {
         }
 }
 
+# Characters treated as spaces between words
+special_chars = [
+    "!", "@", "#", "$", "%", "^", "&", "*", "(", ")",
+    "-", "_", "=", "+", "{", "}", "[", "]", "|", "\\",
+    ":", ";", '"', "'", ",", "<", ">", ".", "?", "~", "`"
+    ]
+separators = str.maketrans({char: " " for char in special_chars})
+
+# Number of distinct normalized lines remembered by parse_many()
+PARSE_CACHE_SIZE = 4096
+
+# Typos forgiven in a word that isn't in the lexicon.  Words shorter
+# than FUZZY_MIN_LENGTH get none, since short words are too easy to
+# mistake, and words shorter than FUZZY_EDIT_LENGTH only get neighbours
+# swapped: "fast" is a word of its own, not a typo of "east".
+FUZZY_DISTANCE = 1
+FUZZY_MIN_LENGTH = 4
+FUZZY_EDIT_LENGTH = 5
+
+# Number of distinct misspelled words remembered by fuzzy_match()
+FUZZY_CACHE_SIZE = 4096
+
+
+def compile_lexicon(lexicon):
+    """Return a dictionary of every known word,
+        key = synonym, eg. 'grab'
+        value = (word type, canonical word), eg. ('verb', 'take')
+    Later entries win, the same as scanning the lexicon in order.
+    """
+
+    word_index = {}
+
+    for word_type, kind in (('verbs', 'verb'), ('objects', 'object')):
+        for canonical, synonyms in lexicon[word_type].items():
+            for synonym in synonyms:
+                word_index[synonym] = (kind, canonical)
+
+    return word_index
+
+
+word_index = compile_lexicon(lexicon)
+
+
+def deletes(word, distance):
+    """Return the set of words made by deleting up to distance
+    characters from word, including word itself
+    """
+
+    variants = {word}
+    edge = {word}
+
+    for step in range(distance):
+        edge = {variant[:index] + variant[index + 1:]
+                for variant in edge for index in range(len(variant))}
+        variants |= edge
+
+    return variants
+
+
+def compile_fuzzy_index(words, distance):
+    """Return a symmetric delete index of words,
+        key = word with up to distance characters deleted,
+        value = list of words it came from
+    Two words within distance typos of each other always share a key,
+    so a misspelling only has to look up its own deletes.
+    """
+
+    fuzzy_index = {}
+
+    for word in words:
+        for variant in deletes(word, distance):
+            fuzzy_index.setdefault(variant, []).append(word)
+
+    return fuzzy_index
+
+
+fuzzy_distance = FUZZY_DISTANCE
+fuzzy_index = compile_fuzzy_index(word_index, fuzzy_distance)
+
+
+def add_words(word_type, canonical, synonyms=()):
+    """Add canonical and its synonyms to lexicon[word_type], 'verbs' or
+    'objects', then update word_index and forget every parsed line.
+    """
+
+    words = lexicon[word_type].setdefault(canonical, [])
+
+    for word in (canonical, *synonyms):
+        if word not in words:
+            words.append(word)
+
+    # In place, so anything holding on to word_index sees the new words
+    word_index.clear()
+    word_index.update(compile_lexicon(lexicon))
+
+    set_fuzzy_distance(fuzzy_distance)
+
+
+def edit_distance(first, second):
+    """Return the optimal string alignment distance between two words:
+    how many characters have to be inserted, deleted, replaced, or
+    swapped with the next one, to turn one into the other
+    """
+
+    previous_row = None
+    row = list(range(len(second) + 1))
+
+    for i in range(1, len(first) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(second)
+
+        for j in range(1, len(second) + 1):
+            cost = first[i - 1] != second[j - 1]
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+
+            if (i > 1 and j > 1 and first[i - 1] == second[j - 2]
+                    and first[i - 2] == second[j - 1]):
+                row[j] = min(row[j], before[j - 2] + 1)
+
+    return row[-1]
+
+
+def is_swap(first, second):
+    """Return True if swapping two neighbouring characters of first
+    gives second
+    """
+
+    if len(first) != len(second):
+        return False
+
+    different = [index for index, (a, b) in enumerate(zip(first, second)) if a != b]
+
+    return (len(different) == 2 and different[1] == different[0] + 1
+            and first[different[0]] == second[different[1]]
+            and first[different[1]] == second[different[0]])
+
+
+def fuzzy_lookup(word):
+    """Return the lexicon word closest to word, within fuzzy_distance
+    typos, or None.  Only neighbours swapped count as a typo while
+    either word is shorter than FUZZY_EDIT_LENGTH.  A word equally
+    close to words with different entries is ambiguous, and also gets
+    None.
+    """
+
+    if len(word) < FUZZY_MIN_LENGTH:
+        return None
+
+    candidates = set()
+    for variant in deletes(word, fuzzy_distance):
+        candidates.update(fuzzy_index.get(variant, ()))
+
+    best_distance = fuzzy_distance + 1
+    closest = {}
+
+    # Sorted, so the word returned for an entry never depends on set order
+    for candidate in sorted(candidates):
+        if min(len(word), len(candidate)) < FUZZY_EDIT_LENGTH:
+            if not is_swap(word, candidate):
+                continue
+            distance = 1
+        else:
+            distance = edit_distance(word, candidate)
+
+        if distance < best_distance:
+            best_distance = distance
+            closest = {word_index[candidate]: candidate}
+        elif distance == best_distance:
+            closest.setdefault(word_index[candidate], candidate)
+
+    if len(closest) == 1:
+        return closest.popitem()[1]
+
+    return None
+
+
+fuzzy_match = functools.lru_cache(maxsize=FUZZY_CACHE_SIZE)(fuzzy_lookup)
+
+
+def set_fuzzy_distance(distance):
+    """Forgive up to distance typos in words missing from the lexicon
+    (0 for none), build the fuzzy index for it and forget every parsed
+    line and misspelled word
+    """
+
+    global fuzzy_distance, fuzzy_index
+    fuzzy_distance = distance
+    fuzzy_index = compile_fuzzy_index(word_index, distance)
+
+    fuzzy_match.cache_clear()
+    cached_parse.cache_clear()
+
+
+def normalize(raw_input):
+    """Return raw_input in lowercase, special chars turned into spaces.
+    Lines that normalize the same way always parse the same way.
+    """
+
+    return raw_input.lower().translate(separators).strip(" ")
+
+
+def tokenize(raw_input):
+    """Return the lowercase words of raw_input, special chars removed"""
+
+    return normalize(raw_input).split(" ")
+
+
 def process(input_char):
-    """Read input, extract command words, drop any words/chars to ignore"""
+    """Read input from the player, return its processed verb and object"""
+
+    return parse(input(input_char))
+
+
+def parse(raw_input):
+    """Extract command words from raw_input, drop any words/chars to ignore"""
+
+    verb, object = parse_normalized(normalize(raw_input))
+
+    processed_input = {'verb': verb, 'object': object}
+
+    return processed_input
+
+
+def parse_normalized(line):
+    """parse() a line that has already been normalized,
+    return a (verb, object) tuple
+    """
 
     verb = ""
     object = ""
+    unknown = []
 
-    raw_input = input(input_char)
+    for word in line.split(" "):
+        entry = word_index.get(word)
 
-    special_chars = [
-        "!", "@", "#", "$", "%", "^", "&", "*", "(", ")",
-        "-", "_", "=", "+", "{", "}", "[", "]", "|", "\\",
-        ":", ";", '"', "'", ",", "<", ">", ".", "?", "~", "`"
-        ]
+        if entry is None:
+            unknown.append(word)
+        elif entry[0] == 'verb':
+            verb = entry[1]
+        else:
+            object = entry[1]
 
-    words = raw_input.split(" ")
+    # Exact matches always win, and typos only stand in for a verb: with
+    # no verb in the line, a misspelled one fills it in, along with a
+    # misspelled object if there is no object either.  After an exact
+    # verb, a word that is only close to an object is left alone, since
+    # "run fast" is not "run east"; see suggest().
+    if not verb and fuzzy_distance:
+        fuzzy_object = ""
 
-    for char in special_chars:
-        words = char.join(words).split(char)
+        for word in unknown:
+            match = fuzzy_match(word)
 
-    for word in words:
-        l_word = word.lower()
+            if match is None:
+                continue
 
-        for word_type in lexicon['verbs']:
-            if l_word in lexicon['verbs'][word_type]:
-                verb = word_type
+            entry = word_index[match]
+            if entry[0] == 'verb':
+                verb = entry[1]
             else:
-                pass
+                fuzzy_object = entry[1]
 
-        for word_type in lexicon['objects']:
-            if l_word in lexicon['objects'][word_type]:
-                object = word_type
-            else:
-                pass
+        if verb:
+            object = object or fuzzy_object
 
-    processed_input = {'verb': verb, 'object': object}
+    return (verb, object)
 
-    return processed_input
+
+def suggest(raw_input):
+    """Return raw_input's words with every typo corrected, eg. "go north"
+    for "go nroth", or None if there is nothing to correct or the
+    corrected line still has no verb.  Nothing is acted on: it is for
+    asking the player "Did you mean ...?" after a line that didn't parse
+    into a command.
+    """
+
+    words = tokenize(raw_input)
+    corrected = []
+    changed = False
+
+    for word in words:
+        if word not in word_index and fuzzy_distance:
+            match = fuzzy_match(word)
+            if match is not None:
+                word = match
+                changed = True
+        corrected.append(word)
+
+    if not changed:
+        return None
+
+    line = " ".join(corrected)
+    if not parse_normalized(line)[0]:
+        return None
+
+    return line
+
+
+cached_parse = functools.lru_cache(maxsize=PARSE_CACHE_SIZE)(parse_normalized)
+
+
+def set_parse_cache_size(maxsize):
+    """Start a new, empty parse cache holding up to maxsize lines
+    (None for no limit, 0 to turn caching off)
+    """
+
+    global cached_parse
+    cached_parse = functools.lru_cache(maxsize=maxsize)(parse_normalized)
+
+
+def parse_cache_info():
+    """Return the parse cache statistics as a dictionary"""
+
+    return cached_parse.cache_info()._asdict()
+
+
+def parse_many(lines):
+    """Return a list with the parse() result of each line, in order.
+    lines can be any iterable of strings, eg. a list or an open file.
+    """
+
+    parse_line = cached_parse
+    results = []
+
+    for line in lines:
+        verb, object = parse_line(normalize(line))
+        results.append({'verb': verb, 'object': object})
+
+    return results
@@ -0,0 +1,193 @@
+"""Fast deterministic replay of TENENBAUM replay logs, see gamelog.py.
+
+Replays run headlessly at full speed.  Use them to reproduce a bug
+report from the player's log, or to check the Engine against a corpus
+of recorded games.
+
+Replayer - replay a log headlessly, seek to any turn
+replay_file() - outcome of a replayed log
+replay_batch() - replay many logs over a pool of worker processes
+main() - command line interface, run: python replay.py --help
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import snapshot
+from gamelog import read_log
+from headless import HeadlessGame
+
+
+class Replayer(object):
+    """Plays a log's commands in a HeadlessGame.
+
+    Every snapshot_every turns it keeps a checkpoint: a snapshot of the
+    game plus the state of its random streams, so seek() only has to
+    play the turns after the nearest checkpoint.
+
+    .game - the HeadlessGame, at .turn commands into the log
+
+    seek() - move the game to just after the given number of commands
+    run() - play to the end of the log, return the outcome
+    """
+
+    def __init__(self, data, snapshot_every=50):
+        self.header, self.commands = read_log(data)
+        self.snapshot_every = snapshot_every
+
+        # key = turn, value = checkpoint taken after that many commands
+        self.checkpoints = {}
+
+        self.game = HeadlessGame(**self.header)
+        self.turn = 0
+        self.checkpoint()
+
+    def checkpoint(self):
+        game = self.game
+        streams = game.engine.streams
+
+        self.checkpoints[self.turn] = (
+            snapshot.snapshot(game.engine, game.map),
+            {name: stream.getstate() for name, stream in streams.streams.items()},
+            streams.forks,
+            game.commands_played,
+            game.tree_source,
+            game.last_action
+            )
+
+    def load_checkpoint(self, turn):
+        (data, stream_states, forks, commands_played, tree_source,
+         last_action) = self.checkpoints[turn]
+
+        game = HeadlessGame(**self.header)
+        snapshot.restore(data, game.engine, game.map)
+
+        streams = game.engine.streams
+        for name, state in stream_states.items():
+            streams.get(name).setstate(state)
+        streams.forks = forks
+
+        game.commands_played = commands_played
+        game.tree_source = tree_source
+        game.last_action = last_action
+
+        self.game = game
+        self.turn = turn
+
+    def seek(self, turn):
+        """Replay up to turn commands, at most the whole log.
+        Return the HeadlessGame.
+        """
+
+        turn = min(turn, len(self.commands))
+
+        if turn < self.turn:
+            nearest = max(checkpoint for checkpoint in self.checkpoints if checkpoint <= turn)
+            self.load_checkpoint(nearest)
+
+        while self.turn < turn:
+            self.game.step(self.commands[self.turn])
+            self.turn += 1
+            if self.turn % self.snapshot_every == 0 and self.turn not in self.checkpoints:
+                self.checkpoint()
+
+        return self.game
+
+    def run(self):
+        self.seek(len(self.commands))
+
+        return self.game.outcome()
+
+
+def replay_file(path, turn=None):
+    """Replay the log at path, up to turn commands if given.
+    Return the game's outcome with the 'log' path added.
+
+    Full replays skip checkpoints, since nothing will seek back.
+    """
+
+    with open(path, 'rb') as log_file:
+        header, commands = read_log(log_file.read())
+
+    game = HeadlessGame(**header)
+    for command in commands[:turn]:
+        game.step(command)
+
+    outcome = game.outcome()
+    outcome['log'] = path
+
+    return outcome
+
+
+def replay_files(job):
+    """Replay a list of logs, job being (paths, turn)"""
+
+    paths, turn = job
+
+    return [replay_file(path, turn) for path in paths]
+
+
+def replay_batch(paths, workers=None, turn=None, shard_size=500):
+    """Replay every log in paths, spread over a pool of workers.
+    Return the outcomes, in the same order as paths.
+    """
+
+    workers = workers or os.cpu_count()
+    jobs = [(paths[start:start + shard_size], turn)
+            for start in range(0, len(paths), shard_size)]
+
+    outcomes = []
+
+    if workers == 1:
+        for job in jobs:
+            outcomes.extend(replay_files(job))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for results in pool.imap(replay_files, jobs):
+                outcomes.extend(results)
+
+    return outcomes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded games headlessly.")
+    parser.add_argument('logs', nargs='+', help="replay logs, or folders of them")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--turn', type=int, help="stop after this many commands")
+    parser.add_argument('--check', help="JSON lines of expected outcomes, one per log")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.logs:
+        if os.path.isdir(path):
+            paths.extend(sorted(os.path.join(path, name) for name in os.listdir(path)))
+        else:
+            paths.append(path)
+
+    start = time.perf_counter()
+    outcomes = replay_batch(paths, args.workers, args.turn)
+    elapsed = time.perf_counter() - start
+
+    if args.check is None:
+        for outcome in outcomes:
+            print(json.dumps(outcome))
+    else:
+        with open(args.check) as check_file:
+            expected = {outcome['log']: outcome for outcome in map(json.loads, check_file)}
+
+        mismatches = [outcome for outcome in outcomes
+                      if expected.get(outcome['log']) != outcome]
+        for outcome in mismatches:
+            print("MISMATCH", json.dumps(outcome))
+        print(f"{len(mismatches)} of {len(outcomes)} logs differ from {args.check}")
+
+    print(f"{len(outcomes):,} logs in {elapsed:.2f}s"
+          f" ({len(outcomes) / elapsed:,.0f} logs/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
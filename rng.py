@@ -0,0 +1,44 @@
+"""Random numbers for TENENBAUM.
+
+Streams - a family of independent random.Random streams, all from one seed
+"""
+
+import random
+
+
+class Streams(object):
+    """Each named stream is its own random.Random, seeded from the seed
+    and the stream's name.  A stream's numbers never depend on how much
+    the other streams were used, or on the global random module, so the
+    same seed replays the same game in any process.
+
+    .seed - an int or str, picked at random if not given
+
+    get() - return the stream with the given name, eg. 'map', 'combat'
+    fork() - a new family of streams, seeded from this seed and the
+        number of forks so far, so a replayed game forks the same way
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        self.seed = seed
+        self.streams = {}
+        self.forks = 0
+
+    def get(self, name):
+        stream = self.streams.get(name)
+
+        if stream is None:
+            stream = random.Random(f"{self.seed}:{name}")
+            self.streams[name] = stream
+
+        return stream
+
+    def fork(self):
+        # Copying a Random's state costs several times more than seeding
+        # a new one, and streams are only seeded once they are used
+        self.forks += 1
+
+        return Streams(f"{self.seed}/{self.forks}")
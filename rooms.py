@@ -0,0 +1,236 @@
+"""Room registry for TENENBAUM, loaded from a content pack.
+
+A content pack is a JSON Lines file, one room per line.  Lines that
+start with the room's id, as below, are indexed without parsing them;
+any other line is parsed for its id, and one that isn't a room with an
+id raises ValueError.  Blank lines are skipped.
+
+    {"id": "shed", "class": "Shed", "nickname": "Old Shed",
+     "fullname": "...", "map_image": " S ", "items": ["axe"],
+     "descriptions": [{"when": "always", "text": ["This is the shed."]}]}
+
+Descriptions are tried in order, the first whose "when" holds is used.
+
+CONDITIONS - what "when" can be, and how each is checked
+RoomRecord - one room's data, with descriptions laid out as Passages
+RoomRegistry - index of a content pack, reads each room on first use
+"""
+
+import json
+import mmap
+
+import text_display
+
+# Each condition is checked against (times_visited, inventory)
+CONDITIONS = {
+    'always': lambda times_visited, inventory: True,
+    'first_visit': lambda times_visited, inventory: times_visited == 0,
+    'has_tree': lambda times_visited, inventory: 'tree' in inventory,
+    'no_tree': lambda times_visited, inventory: 'tree' not in inventory
+    }
+
+# Lines written the usual way start with this, then the room id, so
+# they can be indexed without parsing them
+ID_PREFIX = b'{"id": "'
+
+# Followed by the array of a room's items
+ITEMS_KEY = b'"items":'
+
+
+class RoomRecord(object):
+    """A room from the content pack.
+
+    .room_id, .room_class (name of a Room subclass), .nickname, .fullname,
+    .map_image, .items (tuple)
+    .descriptions - list of (condition check, tuple of Passages)
+    """
+
+    __slots__ = ('room_id', 'room_class', 'nickname', 'fullname',
+                 'map_image', 'items', 'descriptions')
+
+    def __init__(self, data, line_width):
+        self.room_id = data['id']
+        self.room_class = data['class']
+        self.nickname = data['nickname']
+        self.fullname = data['fullname']
+        self.map_image = data['map_image']
+        self.items = tuple(data['items'])
+
+        # Lay out every passage now, so turns never have to
+        self.descriptions = []
+        for description in data['descriptions']:
+            check = CONDITIONS[description['when']]
+            passages = tuple(text_display.Passage(text, line_width)
+                             for text in description['text'])
+            self.descriptions.append((check, passages))
+
+    def describe(self, times_visited, inventory):
+        """Return the first description whose condition holds, or None"""
+
+        for check, passages in self.descriptions:
+            if check(times_visited, inventory):
+                return passages
+
+        return None
+
+
+class RoomRegistry(object):
+    """Rooms of a content pack, by id.
+
+    Nothing is read until the first lookup.  Then the file is memory
+    mapped and scanned once for the offset of each room's line; a room
+    is only parsed, and its descriptions laid out, when it is first
+    asked for.  With lazy=False every room is parsed on that first
+    lookup instead.
+
+    get() - the RoomRecord for a room id
+    ids() - every room id in the pack, in file order
+    items() - every item any room in the pack holds, in file order
+    read_id() - the id of a line that isn't written the usual way
+    describe() - description of a room for its times_visited and inventory
+    """
+
+    def __init__(self, path, line_width, lazy=True):
+        self.path = path
+        self.line_width = line_width
+        self.lazy = lazy
+        self.data = None
+
+        # key = room id, value = (start, end) offsets of its line
+        self.offsets = None
+
+        # key = room id, value = RoomRecord, for rooms parsed so far
+        self.records = {}
+
+        # tuple of every item in the pack, once items() has read them
+        self.item_names = None
+
+    def load(self):
+        with open(self.path, 'rb') as pack:
+            self.data = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data = self.data
+        offsets = {}
+
+        start = 0
+        size = len(data)
+
+        while start < size:
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = size
+
+            if data[start:start + len(ID_PREFIX)] == ID_PREFIX:
+                id_start = start + len(ID_PREFIX)
+                room_id = data[id_start:data.find(b'"', id_start)]
+
+                if b'\\' in room_id:
+                    offsets[self.read_id(start, end)] = (start, end)
+                else:
+                    offsets[room_id.decode()] = (start, end)
+
+            # Written some other way, eg. by hand: parse it for its id
+            elif data[start:end].strip():
+                offsets[self.read_id(start, end)] = (start, end)
+
+            start = end + 1
+
+        self.offsets = offsets
+
+        if not self.lazy:
+            for room_id in offsets:
+                self.get(room_id)
+
+    def read_id(self, start, end):
+        """Return the id of the room on the line from start to end, or
+        raise ValueError naming the line if it isn't a room
+        """
+
+        try:
+            data = json.loads(self.data[start:end])
+        except ValueError as error:
+            data = None
+            problem = f"not valid JSON ({error})"
+        else:
+            problem = 'not a room with a string "id"'
+
+        if not isinstance(data, dict) or not isinstance(data.get('id'), str):
+            line_number = self.data[:start].count(b"\n") + 1
+            raise ValueError(f"{self.path}, line {line_number}: {problem}")
+
+        return data['id']
+
+    def get(self, room_id):
+        record = self.records.get(room_id)
+        if record is not None:
+            return record
+
+        if self.offsets is None:
+            self.load()
+
+        start, end = self.offsets[room_id]
+        record = RoomRecord(json.loads(self.data[start:end]), self.line_width)
+        self.records[room_id] = record
+
+        return record
+
+    def ids(self):
+        if self.offsets is None:
+            self.load()
+
+        return list(self.offsets)
+
+    def items(self):
+        """Return a tuple of every item the pack's rooms hold, each once.
+        Only the items array of each line is parsed, no RoomRecords are
+        built; a line whose array can't be cut out that way, eg. with a
+        space before the colon, is parsed whole.
+        """
+
+        if self.item_names is None:
+            if self.offsets is None:
+                self.load()
+
+            data = self.data
+            names = {}
+
+            # Most rooms hold the same few arrays of items, eg. [], so
+            # each array is only parsed the first time it is seen
+            #     key = array as bytes, value = list of items, or None
+            #         if it isn't a list
+            arrays = {}
+
+            for start, end in self.offsets.values():
+                items = None
+
+                # A '"items":' can't be inside a string, its quotes would be escaped
+                at = data.find(ITEMS_KEY, start, end)
+                if at != -1:
+                    raw = data[at + len(ITEMS_KEY):data.find(b"]", at, end) + 1]
+                    if raw in arrays:
+                        items = arrays[raw]
+                    else:
+                        try:
+                            items = json.loads(raw)
+                        except ValueError:
+                            pass
+                        if not isinstance(items, list):
+                            items = None
+                        arrays[raw] = items
+
+                if items is None:
+                    items = json.loads(data[start:end])['items']
+
+                for item in items:
+                    names[item] = None
+
+            self.item_names = tuple(names)
+
+        return self.item_names
+
+    def describe(self, room_id, times_visited, inventory):
+        """Return a tuple of Passages, or None if the room has no
+        description for this situation.
+        """
+
+        return self.get(room_id).describe(times_visited, inventory)
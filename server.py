@@ -0,0 +1,180 @@
+"""Game server for TENENBAUM, hosting many players in one process.
+
+Every connection gets a Session of its own: an Engine, a Map and a
+Window whose Terminal writes to that connection.  Players type one
+command per line, eg. with telnet or nc:
+
+    python server.py --port 4000
+    nc localhost 4000
+
+SessionStream - text stream for a Terminal, writing to a connection
+SessionWindow - Window that takes commands from the Session
+Session - one player's game, run one line of input at a time
+serve() - run the server until it is stopped
+main() - command line interface, run: python server.py --help
+"""
+
+import argparse
+import asyncio
+import itertools
+
+import instrument
+from main import TITLE_PROMPT, GameSession, Window
+
+
+class SessionStream(object):
+    """Takes the place of stdout for a Terminal.  Writes are buffered by
+    the connection and sent whenever the event loop gets to them.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode())
+
+    def flush(self):
+        pass
+
+
+class SessionWindow(Window):
+    """A Window for a connection.  Nothing here can wait for input, so
+    read_command() returns the line the Session was given, and pause()
+    shows its prompt and leaves the Session waiting for the next line.
+    """
+
+    def __init__(self, stream):
+        Window.__init__(self, 23, 84, 28, stream)
+        self.stream = stream
+        self.next_command = ""
+        self.paused = False
+
+    def read_command(self, prompt):
+        return self.next_command
+
+    def pause(self, prompt):
+        self.stream.write(prompt)
+        self.paused = True
+
+
+class Session(GameSession):
+    """One player's game.  Does what GameSession.play() does, but split
+    where the player has to type something, so the server never waits
+    on them.
+
+    start() - show the title screen
+    handle() - play one line of input, show the result
+    .finished - True once the midnight screen is shown
+    """
+
+    def __init__(self, stream, seed=None, turns_left=None):
+        GameSession.__init__(self, seed, SessionWindow(stream))
+        if turns_left is not None:
+            self.engine.turns_left = turns_left
+
+        self.finished = False
+
+        # action statement of a turn that paused, eg. for the help screen
+        self.paused_action = None
+
+    def start(self):
+        self.start_turn()
+        self.window.pause(TITLE_PROMPT)
+
+    def handle(self, line):
+        map = self.map
+        window = self.window
+
+        if window.paused:
+            window.paused = False
+
+            if map.current_tile is None:
+                # Leaving the title screen
+                map.change_current_room(map.home_tile)
+                last_action = "Our story begins..."
+            else:
+                last_action = self.paused_action
+
+        else:
+            window.next_command = line
+            last_action = self.engine.take_action(window, map)
+
+            if window.paused:
+                self.paused_action = last_action
+                return
+
+        if self.is_over():
+            self.end(last_action)
+            self.finished = True
+            return
+
+        self.finish_turn(last_action)
+        self.start_turn()
+        window.stream.write(window.input_char)
+
+
+async def play(reader, writer, seed=None, turns_left=None):
+    """Run a Session for one connection, until it ends or disconnects"""
+
+    session = Session(SessionStream(writer), seed, turns_left)
+    session.start()
+
+    try:
+        await writer.drain()
+
+        while not session.finished:
+            line = await reader.readline()
+            if not line:
+                break
+
+            session.handle(line.decode(errors='replace').rstrip("\r\n"))
+
+            # Only waits if the player isn't keeping up with the output
+            await writer.drain()
+
+    except (ConnectionError, ValueError):
+        # Dropped connections, and lines too long for the reader
+        pass
+
+    finally:
+        writer.close()
+
+
+async def serve(host='localhost', port=4000, path=None, first_seed=None, turns_left=None):
+    """Accept players on a TCP port, or on a Unix socket at path.
+    With a first_seed, sessions are seeded first_seed, first_seed + 1...
+    """
+
+    seeds = itertools.count(first_seed) if first_seed is not None else itertools.repeat(None)
+
+    async def connected(reader, writer):
+        await play(reader, writer, next(seeds), turns_left)
+
+    if path is not None:
+        server = await asyncio.start_unix_server(connected, path, backlog=4096)
+    else:
+        server = await asyncio.start_server(connected, host, port, backlog=4096)
+
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host TENENBAUM games over the network.")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('--seed', type=int, help="seed of the first session")
+    parser.add_argument('--turns', type=int, help="turns_left at the start")
+    args = parser.parse_args(argv)
+
+    instrument.install_from_environment()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.seed, args.turns))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
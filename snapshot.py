@@ -0,0 +1,323 @@
+"""Compact binary snapshots of a TENENBAUM game.
+
+A snapshot holds the Engine's inventory and turns_left, the room on
+every tile with its items and times_visited, and the current room.
+Random streams are not part of it: a restored game keeps rolling its
+own Engine's streams.
+
+Everything is packed with struct and array, little endian:
+
+    header - magic, fingerprint of the content pack (crc32), world
+        kind, height, width, turns_left, current tile (-1 off the map),
+        current room code (uint32) and times_visited, number of items
+        in the inventory (uint16)
+    inventory - one item code per item, in order
+    FixedWorld - a room code per tile, then times_visited per tile
+        (uint16), then item bits per tile
+    ChunkedWorld - the seed, the numbers of the chunks generated so far,
+        then (tile, times_visited, item bits) for every tile that is no
+        longer as it was generated
+
+Room codes are positions in ROOMS.ids() and item codes positions in
+ROOMS.items(), so a snapshot only restores with the same content pack,
+and restore() raises ValueError if the pack's fingerprint differs, eg.
+after rooms were added or reordered.  The codes are worked out on the
+first snapshot() or restore(), not on import.  Codes and item bits take
+as many bytes as that pack needs, eg. room codes are one byte up to 256
+room ids and two up to 65536.  Item bits can't record how many of an
+item a room holds; each room holds at most one.  A restored world's
+item index is built again from its rooms.
+
+PackCodes - room and item codes of the content pack
+pack_codes() - the PackCodes of ROOMS, worked out on first use
+snapshot() - pack an Engine and Map into bytes
+restore() - set an Engine and Map back to a snapshot, in place
+fork() - copy-on-write copies of an Engine and Map, for tree search
+"""
+
+import json
+import struct
+import zlib
+from array import array
+
+from inventory import Items
+from main import ROOMS, new_room
+from world import ChunkedWorld, FixedWorld
+
+MAGIC = b'TNB3'
+FIXED = 0
+CHUNKED = 1
+
+HEADER = struct.Struct('<4sIBHHhiIHH')
+SEED = struct.Struct('<H')
+COUNT = struct.Struct('<I')
+
+
+def typecode(values):
+    """Return the smallest unsigned array typecode that holds values
+    different numbers, 0 to values - 1
+    """
+
+    for code in 'BHIQ':
+        if values <= 1 << (8 * array(code).itemsize):
+            return code
+
+    raise ValueError(f"no array typecode holds {values} values")
+
+
+class PackCodes(object):
+    """Codes for every room and item of a content pack, code = position.
+
+    .room_ids / .items - tuples, in pack order
+    .room_codes / .item_codes - dictionaries, key = room id or item
+    .room_type / .item_type / .bits_type - array typecodes big enough
+        for a room code, an item code and the item bits of a room
+    .change - struct of a changed ChunkedWorld tile
+    .fingerprint - crc32 of the room ids and items, in order
+
+    item_bits() - item bits for Items, or a tuple of items
+    bits_items() - tuple of items for item bits
+    """
+
+    def __init__(self, room_ids, items):
+        self.room_ids = tuple(room_ids)
+        self.items = tuple(items)
+        self.room_codes = {room_id: code for code, room_id in enumerate(self.room_ids)}
+        self.item_codes = {item: code for code, item in enumerate(self.items)}
+        self.item_bit = {item: 1 << code for code, item in enumerate(self.items)}
+
+        self.room_type = typecode(len(self.room_ids))
+        self.item_type = typecode(len(self.items))
+        self.bits_type = typecode(1 << len(self.items))
+        self.change = struct.Struct('<IH' + self.bits_type)
+
+        self.fingerprint = zlib.crc32(json.dumps([self.room_ids, self.items]).encode())
+
+        # key = item bits, value = tuple of items in .items order, for
+        # the bits seen so far
+        self.bits_cache = {0: ()}
+
+    def item_bits(self, items):
+        if isinstance(items, Items):
+            # Each item once, without going through Items.__iter__
+            items = items.counts
+
+        item_bit = self.item_bit
+        bits = 0
+        for item in items:
+            bits |= item_bit[item]
+
+        return bits
+
+    def bits_items(self, bits):
+        items = self.bits_cache.get(bits)
+
+        if items is None:
+            items = tuple(item for code, item in enumerate(self.items) if bits >> code & 1)
+            self.bits_cache[bits] = items
+
+        return items
+
+
+# PackCodes of ROOMS, None until the first snapshot() or restore()
+CODES = None
+
+
+def pack_codes():
+    """Return the PackCodes of ROOMS, reading the pack's items the first
+    time it is called
+    """
+
+    global CODES
+
+    if CODES is None:
+        CODES = PackCodes(ROOMS.ids(), ROOMS.items())
+
+    return CODES
+
+
+def snapshot(engine, map):
+    """Return the state of a game as bytes"""
+
+    codes = pack_codes()
+    tiles = map.tiles
+    room = map.current_room
+    current_tile = map.current_tile if map.current_tile is not None else -1
+    inventory = array(codes.item_type,
+                      [codes.item_codes[item] for item in engine.player_inventory])
+
+    kind = CHUNKED if isinstance(tiles, ChunkedWorld) else FIXED
+
+    parts = [
+        HEADER.pack(MAGIC, codes.fingerprint, kind, map.height, map.width,
+                    engine.turns_left, current_tile, codes.room_codes[room.room_id],
+                    room.times_visited, len(inventory)),
+        inventory.tobytes()
+        ]
+
+    if kind == FIXED:
+        rooms = tiles.rooms
+        room_codes = codes.room_codes
+        item_bits = codes.item_bits
+        parts.append(array(codes.room_type, [room_codes[room.room_id] for room in rooms]).tobytes())
+        parts.append(array('H', [room.times_visited for room in rooms]).tobytes())
+        parts.append(array(codes.bits_type, [item_bits(room.items) for room in rooms]).tobytes())
+    else:
+        seed = str(tiles.seed).encode()
+        parts.append(SEED.pack(len(seed)) + seed)
+
+        chunks = array('I', tiles.chunks)
+        parts.append(COUNT.pack(len(chunks)) + chunks.tobytes())
+
+        # Only tiles that differ from a freshly generated one
+        changes = []
+        for tile, room in tiles.loaded():
+            bits = codes.item_bits(room.items)
+            if room.times_visited or bits != codes.item_bits(ROOMS.get(room.room_id).items):
+                changes.append(codes.change.pack(tile, room.times_visited, bits))
+
+        parts.append(COUNT.pack(len(changes)))
+        parts.extend(changes)
+
+    return b''.join(parts)
+
+
+def restore(data, engine, map):
+    """Set engine and map back to the state in a snapshot.
+
+    map must be the same kind of world as the one the snapshot was
+    taken from, eg. a Map with a distribution for a ChunkedWorld.
+    Rooms are reused where the room on a tile is unchanged and no fork
+    shares it, otherwise they are built again.
+    """
+
+    (magic, fingerprint, kind, height, width, turns_left, current_tile, current_code,
+     current_visits, inventory_size) = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ValueError("not a TENENBAUM snapshot")
+
+    codes = pack_codes()
+    if fingerprint != codes.fingerprint:
+        raise ValueError("snapshot was taken with another content pack")
+    if (height, width) != (map.height, map.width):
+        raise ValueError(f"snapshot is {height}x{width}, map is {map.height}x{map.width}")
+
+    offset = HEADER.size
+    engine.turns_left = turns_left
+
+    inventory = array(codes.item_type)
+    inventory.frombytes(data[offset:offset + inventory_size * inventory.itemsize])
+    engine.player_inventory = Items(codes.items[code] for code in inventory)
+    offset += inventory_size * inventory.itemsize
+
+    if kind == FIXED:
+        restore_fixed(data, offset, map, codes)
+    else:
+        restore_chunked(data, offset, map, codes)
+
+    if current_tile >= 0:
+        map.change_current_room(current_tile)
+    else:
+        room_id = codes.room_ids[current_code]
+        if map.current_room.room_id != room_id:
+            map.current_room = new_room(room_id)
+        map.current_tile = None
+        map.current_room.times_visited = current_visits
+
+    map.visibility.rebuild(map.tiles, 'map' in engine.player_inventory)
+
+
+def restore_fixed(data, offset, map, codes):
+    """Read a FixedWorld's tiles from data, starting at offset"""
+
+    tile_count = map.height * map.width
+
+    room_codes = array(codes.room_type)
+    room_codes.frombytes(data[offset:offset + room_codes.itemsize * tile_count])
+    offset += room_codes.itemsize * tile_count
+
+    visits = array('H')
+    visits.frombytes(data[offset:offset + 2 * tile_count])
+    offset += 2 * tile_count
+
+    bits = array(codes.bits_type)
+    bits.frombytes(data[offset:offset + bits.itemsize * tile_count])
+
+    world = map.tiles
+    if not isinstance(world, FixedWorld):
+        raise ValueError("snapshot is of a FixedWorld")
+
+    rooms = world.rooms
+    owned = world.owned
+    room_ids = codes.room_ids
+    bits_items = codes.bits_items
+    for tile, room, code, times_visited, bits in zip(range(tile_count), rooms,
+                                                     room_codes, visits, bits):
+        room_id = room_ids[code]
+        items = bits_items(bits)
+
+        # Rooms shared with a fork or other worlds are left alone if the
+        # snapshot has them as they are, or else copied before changing
+        if owned is not None and tile not in owned:
+            if (room.room_id == room_id and room.times_visited == times_visited
+                    and room.items.size == len(items) and tuple(room.items.counts) == items):
+                continue
+            room = world.writable(tile)
+
+        if room.room_id != room_id:
+            room = rooms[tile] = new_room(room_id)
+        room.times_visited = times_visited
+        # Most rooms hold the same items before and after
+        if room.items.size != len(items) or tuple(room.items.counts) != items:
+            room.items = Items(items)
+
+    world.index_items()
+
+
+def restore_chunked(data, offset, map, codes):
+    """Read a ChunkedWorld's seed and changed tiles from data, starting
+    at offset.  The chunks are generated again from the seed.
+    """
+
+    world = map.tiles
+    if not isinstance(world, ChunkedWorld):
+        raise ValueError("snapshot is of a ChunkedWorld")
+
+    (seed_size,) = SEED.unpack_from(data, offset)
+    offset += SEED.size
+    seed = data[offset:offset + seed_size].decode()
+    offset += seed_size
+
+    (chunk_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    chunks = array('I')
+    chunks.frombytes(data[offset:offset + 4 * chunk_count])
+    offset += 4 * chunk_count
+
+    # Chunks come out the same from str(seed) as from the seed itself
+    world = world.empty(seed)
+    map.tiles = world
+
+    for chunk in chunks:
+        world.generate_chunk(chunk)
+
+    (change_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+
+    for tile, times_visited, bits in codes.change.iter_unpack(
+            data[offset:offset + codes.change.size * change_count]):
+        room = world[tile]
+        room.times_visited = times_visited
+        room.items = Items(codes.bits_items(bits))
+
+    world.index_items()
+
+
+def fork(engine, map):
+    """Return (Engine, Map) copies of a game, to play on without
+    changing the original.  Rooms are shared until either game changes
+    one, so a fork costs about the same on any size of map.
+    """
+
+    return (engine.fork(), map.fork())
@@ -0,0 +1,186 @@
+"""Shortest winning routes for TENENBAUM maps.
+
+A route starts at the House, collects the axe, the map if asked for,
+and a tree from a ChristmasTree room, then returns to the House.  Turn
+costs are the Engine's: 1 per move, 1 per item taken, and one per axe
+swing when cutting a tree.  The tree has to be cut down, with the axe
+already in hand; the Engine's act_take would hand a tree over for 1
+turn, but a route that does that isn't a real solution.
+
+solve() - cheapest route on a Map, as a tuple of commands
+solve_seeds() - solve the maps of many seeds, to find unwinnable ones
+main() - command line interface, run: python solver.py --help
+"""
+
+import argparse
+import functools
+import heapq
+
+from headless import HeadlessGame
+from main import ChristmasTree
+from world import FixedWorld
+
+DIRECTIONS = (('n', 'north'), ('e', 'east'), ('s', 'south'), ('w', 'west'))
+
+# Inventory bits in a search state
+AXE = 1
+MAP = 2
+TREE = 4
+
+
+def tile_items(room):
+    """Return the inventory bits a room can give the player"""
+
+    bits = 0
+    if 'axe' in room.items:
+        bits |= AXE
+    if 'map' in room.items:
+        bits |= MAP
+    if 'tree' in room.items and isinstance(room, ChristmasTree):
+        bits |= TREE
+
+    return bits
+
+
+def solve(map, turns_left=20, require_map=False, swing_cost=2):
+    """Return the cheapest winning route from the House on the given Map
+    as a dictionary: 'turns' used and the tuple of 'commands' to get there.
+    Both are None if no route fits within turns_left.
+
+    swing_cost is what cutting a tree is counted as, eg. the low end of
+    the Engine's swing_range for a best case.
+
+    Only tiles reachable within turns_left are looked at, so generated
+    worlds only build the chunks near the House.
+    """
+
+    goal = AXE | TREE | (MAP if require_map else 0)
+    start = (map.home_tile, 0)
+
+    # A FixedWorld's item index covers every room, so a missing item
+    # means there is no route at all
+    if isinstance(map.tiles, FixedWorld):
+        index = map.tiles.item_index
+        trees = [tile for tile in index.tiles.get('tree', ())
+                 if isinstance(map.tiles[tile], ChristmasTree)]
+        if not trees or not index.count('axe') or (require_map and not index.count('map')):
+            return {'turns': None, 'commands': None}
+
+    # Dijkstra over (tile, inventory bits)
+    best = {start: 0}
+    came_from = {start: None}
+    queue = [(0, start)]
+    items_at = {}
+
+    while queue:
+        turns, state = heapq.heappop(queue)
+        if turns > best[state]:
+            continue
+
+        tile, inventory = state
+        if tile == map.home_tile and inventory & goal == goal:
+            return {'turns': turns, 'commands': route(came_from, state)}
+
+        if tile not in items_at:
+            items_at[tile] = tile_items(map.tiles[tile])
+        available = items_at[tile] & ~inventory
+
+        moves = []
+        for direction, name in DIRECTIONS:
+            neighbor = map.neighbor(tile, direction)
+            if neighbor is not None:
+                moves.append(((neighbor, inventory), 1, "go " + name))
+
+        # Each room holds at most one item, so taking it empties the room
+        if available & AXE:
+            moves.append(((tile, inventory | AXE), 1, "take axe"))
+        if available & MAP:
+            moves.append(((tile, inventory | MAP), 1, "take map"))
+        if available & TREE and inventory & AXE:
+            moves.append(((tile, inventory | TREE), swing_cost, "cut tree"))
+
+        for next_state, cost, command in moves:
+            next_turns = turns + cost
+            if next_turns > turns_left:
+                continue
+            if next_turns < best.get(next_state, next_turns + 1):
+                best[next_state] = next_turns
+                came_from[next_state] = (state, command)
+                heapq.heappush(queue, (next_turns, next_state))
+
+    return {'turns': None, 'commands': None}
+
+
+def route(came_from, state):
+    """Follow came_from back to the start, return the tuple of commands"""
+
+    commands = []
+
+    while came_from[state] is not None:
+        state, command = came_from[state]
+        commands.append(command)
+
+    commands.reverse()
+
+    return tuple(commands)
+
+
+@functools.lru_cache(maxsize=65536)
+def cached_solve(seed, require_map, turns_left, swing_cost):
+    """Solve the Map a HeadlessGame builds from seed, memoized.  The
+    result is shared by every caller, use solve_seed() instead.
+    """
+
+    game = HeadlessGame(seed, turns_left=turns_left)
+
+    return solve(game.map, turns_left, require_map, swing_cost)
+
+
+def solve_seed(seed, require_map=False, turns_left=20, swing_cost=2):
+    """Solve the Map a HeadlessGame builds from seed, memoized.  Returns
+    a new dictionary each call; its 'commands' are a tuple.
+    """
+
+    return dict(cached_solve(seed, require_map, turns_left, swing_cost))
+
+
+def solve_seeds(seeds, require_map=False, turns_left=20, swing_cost=2):
+    """Return a list of results for the given seeds, each solve()'s
+    dictionary plus the 'seed'.
+    """
+
+    results = []
+
+    for seed in seeds:
+        result = solve_seed(seed, require_map, turns_left, swing_cost)
+        result['seed'] = seed
+        results.append(result)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the shortest winning route for each seed.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help="first seed")
+    parser.add_argument('--turns', type=int, default=20, help="turns_left at the start")
+    parser.add_argument('--swing-cost', type=int, default=2, help="turns to cut a tree")
+    parser.add_argument('--require-map', action='store_true')
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.games)
+    results = solve_seeds(seeds, args.require_map, args.turns, args.swing_cost)
+
+    unwinnable = [result['seed'] for result in results if result['turns'] is None]
+    winnable = [result['turns'] for result in results if result['turns'] is not None]
+
+    if winnable:
+        print(f"Shortest route: {min(winnable)} turns, longest: {max(winnable)},"
+              f" average: {sum(winnable) / len(winnable):.2f}")
+    print(f"Unwinnable: {len(unwinnable)} of {len(results)}")
+    if unwinnable:
+        print("Seeds:", " ".join(str(seed) for seed in unwinnable))
+
+
+if __name__ == "__main__":
+    main()
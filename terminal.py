@@ -0,0 +1,167 @@
+"""Terminal output for TENENBAUM, using ANSI escape sequences.
+
+Terminal - set up the window once, then write frames to a stream,
+    only redrawing the parts of the screen that changed
+changed_spans() - find the column ranges that differ between two lines
+column_changes() - which columns differ between two lines, as bytes
+"""
+
+import os
+import sys
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE_END = "\x1b[K"
+CLEAR_SCREEN_END = "\x1b[J"
+
+# Unchanged gaps shorter than a cursor move are cheaper to rewrite
+MIN_GAP = 8
+UNCHANGED_GAP = b"\0" * MIN_GAP
+
+
+def move_cursor(row, column):
+    """Escape sequence to move the cursor, row and column count from 0"""
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+def column_changes(old_line, new_line, length):
+    """Return a bytes with one byte for each of the first length columns
+    of two lines, 0 where they have the same character.
+
+    Each line becomes a number with 8 bits a character, or 32 if it has
+    any beyond latin-1, so one XOR compares every column at once,
+    without looking at the characters one at a time.
+    """
+
+    if len(old_line) != length:
+        old_line = old_line[:length]
+    if len(new_line) != length:
+        new_line = new_line[:length]
+
+    try:
+        difference = (int.from_bytes(old_line.encode('latin-1'), 'little')
+                      ^ int.from_bytes(new_line.encode('latin-1'), 'little'))
+
+    except UnicodeEncodeError:
+        data = (int.from_bytes(old_line.encode('utf-32-le', 'surrogatepass'), 'little')
+                ^ int.from_bytes(new_line.encode('utf-32-le', 'surrogatepass'), 'little')
+                ).to_bytes(4 * length, 'little')
+
+        # Any of a column's 4 bytes differing makes its byte nonzero
+        difference = 0
+        for part in range(4):
+            difference |= int.from_bytes(data[part::4], 'little')
+
+    return difference.to_bytes(length, 'little')
+
+
+def changed_spans(old_line, new_line):
+    """Return a list of (start, end) column ranges where new_line differs
+    from old_line.  Spans closer together than MIN_GAP are merged.
+
+    If most of the line changed, everything from the first changed
+    column to the last is one span, since rewriting it is cheaper than
+    splitting it up.
+    """
+
+    spans = []
+    common = min(len(old_line), len(new_line))
+
+    changes = column_changes(old_line, new_line, common)
+    first = common - len(changes.lstrip(b"\0"))
+    last = len(changes.rstrip(b"\0"))
+
+    if first < last:
+        if (last - first) * 2 > len(new_line):
+            spans.append((first, last))
+
+        else:
+            start = first
+            while True:
+                gap = changes.find(UNCHANGED_GAP, start, last)
+                if gap == -1:
+                    spans.append((start, last))
+                    break
+
+                spans.append((start, gap))
+                start = last - len(changes[gap:last].lstrip(b"\0"))
+
+    # Anything past the end of the shorter line has changed too
+    if len(new_line) > common:
+        if spans and common - spans[-1][1] < MIN_GAP:
+            spans[-1] = (spans[-1][0], len(new_line))
+        else:
+            spans.append((common, len(new_line)))
+
+    return spans
+
+
+class Terminal(object):
+    """Writes frames to a buffered text stream (stdout by default).
+
+    .previous_frame - lines currently on screen, None forces a full redraw
+
+    setup() - bring Terminal.app forward and set its font (macOS only),
+        then resize the window.  Runs once, before the first frame.
+    clear() - clear the screen, cursor to the top left
+    write_frame() - update the screen to show a list of lines
+    """
+
+    def __init__(self, height, width, font_size, stream=None):
+        """height and width are defined by number of characters"""
+        self.height = height
+        self.width = width
+        self.font_size = font_size
+        self.stream = stream if stream is not None else sys.stdout
+        self.is_setup = False
+        self.previous_frame = None
+
+    def setup(self):
+        # Only Terminal.app understands these, skip them anywhere else,
+        # and when writing to anything but the local screen
+        if sys.platform == 'darwin' and self.stream is sys.stdout:
+            os.system('osascript -e \'tell app "System Events" to tell process "Terminal" to set frontmost to true\'')
+            os.system(f'osascript -e \'tell app "Terminal" to set font size of first window to "{self.font_size}"\'')
+
+        self.stream.write(f"\x1b[8;{self.height};{self.width}t")
+        self.is_setup = True
+
+    def clear(self):
+        self.stream.write(CLEAR_SCREEN)
+        self.stream.flush()
+        self.previous_frame = None
+
+    def write_frame(self, lines):
+        """Show the given lines.  The first frame is drawn in full, after
+        that only the changed parts of changed lines are rewritten.
+        The cursor is left on the line below the frame, ready for input.
+        """
+
+        if not self.is_setup:
+            self.setup()
+
+        previous = self.previous_frame
+
+        if previous is None or len(previous) != len(lines):
+            output = CLEAR_SCREEN + "\n".join(lines) + "\n"
+
+        else:
+            updates = []
+
+            for row, line in enumerate(lines):
+                old_line = previous[row]
+                if line == old_line:
+                    continue
+
+                for start, end in changed_spans(old_line, line):
+                    updates.append(move_cursor(row, start) + line[start:end])
+
+                if len(line) < len(old_line):
+                    updates.append(move_cursor(row, len(line)) + CLEAR_LINE_END)
+
+            # Wipe the last prompt and whatever the player typed after it
+            updates.append(move_cursor(len(lines), 0) + CLEAR_SCREEN_END)
+            output = "".join(updates)
+
+        self.stream.write(output)
+        self.stream.flush()
+        self.previous_frame = list(lines)
@@ -0,0 +1,40 @@
+"""Regression tests for gamelog.py, run: python -m unittest discover tests"""
+
+import os
+import tempfile
+import unittest
+
+from gamelog import MAX_COMMAND, read_log
+from headless import HeadlessGame
+from replay import replay_file
+
+
+class LongCommandTest(unittest.TestCase):
+
+    def test_long_non_ascii_command(self):
+        handle, path = tempfile.mkstemp(suffix='.log')
+        os.close(handle)
+        os.remove(path)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+
+        # Two bytes a character, cut off with half of one past MAX_COMMAND
+        long_command = "go north " + "é" * MAX_COMMAND
+        game = HeadlessGame(7, record=path)
+        game.step("take axe")
+        game.step(long_command)
+        game.step("go east")
+        game.log.close()
+
+        with open(path, 'rb') as log_file:
+            header, commands = read_log(log_file.read())
+
+        self.assertEqual(len(commands), 3)
+        self.assertLessEqual(len(commands[1].encode()), MAX_COMMAND)
+        self.assertTrue(long_command.startswith(commands[1]))
+        outcome = replay_file(path)
+        del outcome['log']
+        self.assertEqual(outcome, game.outcome())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Regression tests for read_input.py, run: python -m unittest discover tests"""
+
+import unittest
+
+import read_input
+from headless import HeadlessGame
+from main import INVALID_STATEMENT
+
+# Everyday phrasing, each a typo or two away from a lexicon word, that
+# must never be taken for a command
+NATURAL_PHRASES = [
+    "run fast", "move fast", "walk easy", "go past the barn", "go to town",
+    "dont fall", "good night", "three", "lets go", "i am done", "at dawn",
+    "held", "rake", "tame", "last", "might", "light", "the night is long",
+    "rest", "well", "best", "feel", "then", "this is fine", "make a wish",
+    "tell me more", "worth it", "with my mouth", "feel the cold", "sell it",
+    ]
+
+# Typos that are still understood
+TYPOS = {
+    "tkae axe": ('take', 'axe'),
+    "chpo tree": ('cut', 'tree'),
+    "mvoe nroth": ('move', 'n'),
+    "hlep": ('help', ''),
+    }
+
+
+class NaturalPhrasingTest(unittest.TestCase):
+
+    def test_phrases_are_not_commands(self):
+        for phrase in NATURAL_PHRASES:
+            with self.subTest(phrase=phrase):
+                game = HeadlessGame(0)
+                turns_left = game.engine.turns_left
+                statement = game.step(phrase)
+
+                self.assertEqual(game.engine.turns_left, turns_left)
+                self.assertTrue(statement.startswith("I don't understand"), statement)
+
+    def test_exact_verb_keeps_its_object_slot(self):
+        self.assertEqual(read_input.parse("run fast"), {'verb': 'move', 'object': ''})
+        self.assertEqual(read_input.parse("go nroth"), {'verb': 'move', 'object': ''})
+
+    def test_typos(self):
+        for line, (verb, object) in TYPOS.items():
+            with self.subTest(line=line):
+                self.assertEqual(read_input.parse(line), {'verb': verb, 'object': object})
+
+    def test_suggestion_costs_no_turn(self):
+        game = HeadlessGame(0)
+        turns_left = game.engine.turns_left
+        statement = game.step("go nroth")
+
+        self.assertEqual(game.engine.turns_left, turns_left)
+        self.assertNotEqual(statement, INVALID_STATEMENT)
+        self.assertIn('"go north"', statement)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Regression tests for rooms.py, run: python -m unittest discover tests"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from rooms import RoomRegistry
+
+PACK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rooms.jsonl')
+
+
+class RegistryLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(PACK) as pack:
+            self.lines = pack.read().splitlines()
+        self.room = json.loads(self.lines[1])
+
+    def registry(self, lines):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w') as pack:
+            pack.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, path)
+
+        return RoomRegistry(path, 46)
+
+    def test_lines_written_other_ways(self):
+        compact = json.dumps(self.room, separators=(',', ':'))
+        reordered = json.dumps(dict(reversed(list(self.room.items()))))
+
+        for line in (compact, reordered):
+            with self.subTest(line=line[:20]):
+                registry = self.registry([self.lines[0], line, "", self.lines[2]])
+
+                self.assertEqual(len(registry.ids()), 3)
+                self.assertEqual(registry.get(self.room['id']).nickname, self.room['nickname'])
+
+    def test_bad_lines_raise(self):
+        for line in ('{"name": "x"}', 'not json', '[1, 2]', '{"id": 5}'):
+            with self.subTest(line=line):
+                registry = self.registry([self.lines[0], line])
+
+                with self.assertRaisesRegex(ValueError, "line 2"):
+                    registry.ids()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Regression tests for snapshot.py, run: python -m unittest discover tests"""
+
+import unittest
+
+import snapshot
+from headless import HeadlessGame
+from main import ROOM_DISTRIBUTION, ROOMS
+
+COMMANDS = ["go north", "take axe", "go east", "take map", "go south", "cut tree"]
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def played(self, seed, distribution=None):
+        game = HeadlessGame(seed, distribution=distribution)
+        for command in COMMANDS:
+            game.step(command)
+
+        return game
+
+    def test_round_trip(self):
+        for distribution in (None, ROOM_DISTRIBUTION):
+            with self.subTest(chunked=distribution is not None):
+                game = self.played(3, distribution)
+                data = snapshot.snapshot(game.engine, game.map)
+
+                other = HeadlessGame(4, distribution=distribution)
+                snapshot.restore(data, other.engine, other.map)
+
+                self.assertEqual(snapshot.snapshot(other.engine, other.map), data)
+
+    def test_other_content_pack(self):
+        game = self.played(3)
+        data = snapshot.snapshot(game.engine, game.map)
+
+        # The same pack with its rooms in another order
+        codes = snapshot.pack_codes()
+        self.addCleanup(setattr, snapshot, 'CODES', codes)
+        snapshot.CODES = snapshot.PackCodes(reversed(ROOMS.ids()), ROOMS.items())
+
+        with self.assertRaisesRegex(ValueError, "another content pack"):
+            snapshot.restore(data, game.engine, game.map)
+
+
+if __name__ == "__main__":
+    unittest.main()
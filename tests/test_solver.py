@@ -0,0 +1,25 @@
+"""Regression tests for solver.py, run: python -m unittest discover tests"""
+
+import unittest
+
+from solver import solve_seed
+
+
+class SolveSeedTest(unittest.TestCase):
+
+    def test_callers_do_not_share_results(self):
+        seed = next(seed for seed in range(100) if solve_seed(seed)['commands'])
+
+        result = solve_seed(seed)
+        commands = result['commands']
+        result['commands'] = None
+        result['seed'] = seed
+
+        again = solve_seed(seed)
+        self.assertEqual(again['commands'], commands)
+        self.assertNotIn('seed', again)
+        self.assertIsInstance(again['commands'], tuple)
+
+
+if __name__ == '__main__':
+    unittest.main()
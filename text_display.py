@@ -1,69 +1,102 @@
 """Various functions to display text in TENENBAUM.
 
+iter_words - split a block of text into words, one line at a time
+wrap - yield lines of words within a certain width, in linear time
 fit_text - display a block of text within a certain width
 clean_text - clear away any whitespaces from text before running fit_text
 center - run clean_text before centering a block of text
 left_align - run clean_text before left aligning a block of text
 vert_align - push a block of text to the top of specified number of lines
+layout_lines - center or left_align a block of text, always as a tuple
+layout - memoized center or left_align, for text that is shown again and again
+set_layout_cache_size - change how many blocks of text layout remembers
+layout_cache_info - hits, misses, maxsize and currsize of that cache
+Passage - a block of text laid out once, as a fixed tuple of lines
+TextBox - a fixed height box of lines, filled from Passages, can scroll
 """
 
+import functools
 
-def fit_text(text, line_width):
-    """Return a list of lines, limiting the length of each line to
-    the given line_width.
-    """
+# Number of (text, line_width, alignment) layouts remembered by layout()
+LAYOUT_CACHE_SIZE = 1024
 
-    # Including the empty string cleans up the if-else statement
-    text_lines = ['']
 
-    # create a list of lines, where the words fit the line width
-    i = 0
-    while len(text) > 0:
-        word = text[0]
-        line = text_lines[i]
+def iter_words(text):
+    """Yield the words of text, one line of it at a time.
+    Lines are stripped of leading/trailing whitespace first, and line
+    breaks count as a space between words.
+    """
 
-        string_length = len(line) + 1 + len(word)
+    start = 0
 
-        if (string_length <= line_width) and (len(line) > 0):
-            text_lines[i] += " " + text.pop(0)
-        else:
-            text_lines.append(text.pop(0))
-            i += 1
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield from text[start:].strip().split(" ")
+            return
 
-    # get rid of initial empty entry
-    return text_lines[1:]
+        yield from text[start:end].strip().split(" ")
+        start = end + 1
 
 
-def clean_text(text, line_width):
-    """Clear leading/trailing whitespace and line breaks,
-    return list of lines with length of line_width,
-    including trailing whitespaces
+def wrap(words, line_width, hard_break=False):
+    """Yield lines made of the given words, each limited to line_width
+    where possible.  A word longer than line_width gets a line of its
+    own, or with hard_break is cut into pieces of line_width.
     """
 
-    # Split the string text at each line break
-    text_lines = text.split("\n")
+    line = None
+    line_length = 0
+
+    for word in words:
 
-    # Remove trailing and leading whitespace from each line
-    stripped_lines = []
-    for line in text_lines:
-        stripped_lines.append(line.strip())
+        if hard_break and len(word) > line_width:
+            if line is not None:
+                yield " ".join(line)
 
-    stripped_text = " ".join(stripped_lines)
+            pieces = range(0, len(word), line_width)
+            for start in pieces[:-1]:
+                yield word[start:start + line_width]
 
-    words = stripped_text.split(" ")
+            word = word[pieces[-1]:]
+            line = None
 
-    # create a list of lines, where the words fit the line width
-    clean_lines = fit_text(words, line_width)
+        if (line is not None) and (line_length > 0) and (line_length + 1 + len(word) <= line_width):
+            line.append(word)
+            line_length += 1 + len(word)
+        else:
+            if line is not None:
+                yield " ".join(line)
+            line = [word]
+            line_length = len(word)
+
+    if line is not None:
+        yield " ".join(line)
+
+
+def fit_text(text, line_width, hard_break=False):
+    """Return a list of lines, limiting the length of each line to
+    the given line_width.  text is a list of words.
+    """
 
-    return clean_lines
+    return list(wrap(text, line_width, hard_break))
 
 
-def center(text, line_width):
+def clean_text(text, line_width, hard_break=False):
+    """Clear leading/trailing whitespace and line breaks,
+    return list of lines with length of line_width,
+    including trailing whitespaces
+    """
+
+    return list(wrap(iter_words(text), line_width, hard_break))
+
+
+def center(text, line_width, hard_break=False):
     """Return a list of lines, centered to the given line_width,
     including whitespace to fill the line to the left and right
     """
 
-    clean_lines = clean_text(text, line_width)
+    clean_lines = clean_text(text, line_width, hard_break)
     centered_lines = []
 
     for line in clean_lines:
@@ -77,12 +110,12 @@ def center(text, line_width):
         return centered_lines
 
 
-def left_align(text, line_width):
+def left_align(text, line_width, hard_break=False):
     """Return a list of lines, left aligned in the given line_width,
     including whitespace to fill the line on the right
     """
 
-    clean_lines = clean_text(text, line_width)
+    clean_lines = clean_text(text, line_width, hard_break)
     left_aligned_lines = []
 
     for line in clean_lines:
@@ -118,3 +151,115 @@ def vert_align(text, line_width, list_height):
             lines.append(empty_line)
 
         return lines
+
+
+def layout_lines(text, line_width, alignment='left'):
+    """Return a tuple of lines, aligned 'left' or 'center' in the given
+    line_width, even when there is only one line.
+    """
+
+    if alignment == 'center':
+        lines = center(text, line_width)
+    else:
+        lines = left_align(text, line_width)
+
+    if isinstance(lines, str):
+        return (lines,)
+    else:
+        return tuple(lines)
+
+
+cached_layout_lines = functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)(layout_lines)
+
+
+def layout(text, line_width, alignment='left'):
+    """Same as left_align() or center(), but remembers the result for
+    each (text, line_width, alignment).  Returns one line as a str,
+    otherwise a tuple of lines, which callers must not change.
+    """
+
+    lines = cached_layout_lines(text, line_width, alignment)
+
+    if len(lines) == 1:
+        return lines[0]
+    else:
+        return lines
+
+
+def set_layout_cache_size(maxsize):
+    """Start a new, empty layout cache holding up to maxsize layouts
+    (None for no limit, 0 to turn caching off)
+    """
+
+    global cached_layout_lines
+    cached_layout_lines = functools.lru_cache(maxsize=maxsize)(layout_lines)
+
+
+def layout_cache_info():
+    """Return the layout cache statistics as a dictionary"""
+
+    return cached_layout_lines.cache_info()._asdict()
+
+
+class Passage(object):
+    """A block of text, laid out when it is made.
+
+    .text - the text as written
+    .line_width - width it was laid out in
+    .alignment - 'left' or 'center'
+    .lines - tuple of lines, each exactly line_width long
+    .line_count - len(lines)
+    """
+
+    __slots__ = ('text', 'line_width', 'alignment', 'lines', 'line_count')
+
+    def __init__(self, text, line_width, alignment='left'):
+        self.text = text
+        self.line_width = line_width
+        self.alignment = alignment
+        self.lines = cached_layout_lines(text, line_width, alignment)
+        self.line_count = len(self.lines)
+
+
+class TextBox(object):
+    """A box of height lines, each line_width wide.
+
+    .lines - the visible lines, always exactly height of them
+    .content - every line of the passages in the box, can be taller
+        than the box, in which case scroll() moves through it
+    .top - index in content of the first visible line
+
+    fill() - replace the content with the lines of a list of Passages
+    scroll() - move the visible lines up or down through the content
+    """
+
+    def __init__(self, height, line_width):
+        self.height = height
+        self.line_width = line_width
+        self.blank_line = " " * line_width
+        self.lines = [self.blank_line] * height
+        self.content = []
+        self.top = 0
+
+    def fill(self, passages):
+        content = []
+        for passage in passages:
+            content.extend(passage.lines)
+
+        self.content = content
+        self.top = 0
+        self.refresh()
+
+    def scroll(self, line_count):
+        """Scroll down by line_count lines, or up if it is negative"""
+
+        bottom = max(0, len(self.content) - self.height)
+        self.top = min(max(0, self.top + line_count), bottom)
+        self.refresh()
+
+    def refresh(self):
+        """Copy the visible part of the content into lines, pad with blanks"""
+
+        visible = self.content[self.top:self.top + self.height]
+        self.lines[:len(visible)] = visible
+        self.lines[len(visible):] = [self.blank_line] * (self.height - len(visible))
@@ -0,0 +1,390 @@
+"""Lockstep simulation of many TENENBAUM games at once, with NumPy.
+
+VectorGames keeps N games as arrays instead of Engine and Map objects:
+the current tile, turns_left and inventory bits of each game, and the
+item bits and times_visited of every tile of every game.  step() plays
+one command in every game with a handful of array operations, by the
+same rules as HeadlessGame.step(): enter the room, then act_move,
+act_take or act_cut.  Swings are drawn from each game's own 'combat'
+stream, the same numbers the Engine would draw.
+
+Only maps without a distribution (FixedWorlds) are supported, and
+commands are encoded once up front with encode(), so the arrays hold
+small action codes instead of strings.
+
+NumPy is only needed for this module: pip install numpy
+
+encode() / encode_scripts() - action codes for commands
+VectorGames - N games stepped in lockstep
+check() - compare VectorGames against HeadlessGames on the same seeds
+main() - command line interface, run: python vector.py --help
+"""
+
+import argparse
+import random
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import read_input
+from headless import ENDINGS, HeadlessGame
+from main import ROOM_CLASSES, ROOMS, ChristmasTree, home_tile, map_layout
+from rng import Streams
+
+# Item bits, for inventories and tiles, one per item in the content pack
+ITEMS = ROOMS.items()
+ITEM_BITS = {item: 1 << code for code, item in enumerate(ITEMS)}
+AXE = ITEM_BITS['axe']
+TREE = ITEM_BITS['tree']
+
+# Action codes.  NOTHING covers help and anything the Engine doesn't
+# understand, neither of which changes the game.
+NOTHING = 0
+MOVES = {'n': 1, 'e': 2, 's': 3, 'w': 4}
+TAKES = {item: 5 + code for code, item in enumerate(ITEMS)}
+CUT_TREE = 5 + len(ITEMS)
+ACTIONS = CUT_TREE + 1
+
+# Tree sources, for endings
+NO_TREE = 0
+OTHER_TREE = 1
+CHRISTMAS_TREE = 2
+
+
+def encode(command):
+    """Return the action code for a command, as the Engine reads it"""
+
+    parsed = read_input.parse(command)
+    verb = parsed['verb']
+    object = parsed['object']
+
+    if verb == 'move':
+        return MOVES.get(object, NOTHING)
+    if verb == 'take':
+        return TAKES.get(object, NOTHING)
+    if verb == 'cut' and object == 'tree':
+        return CUT_TREE
+
+    return NOTHING
+
+
+def encode_scripts(scripts):
+    """Return (actions, lengths) for a list of scripts: an array
+    of action codes, one row per script, padded to the longest, and
+    the length of each script.
+    """
+
+    lengths = numpy.array([len(script) for script in scripts], dtype=numpy.int32)
+    actions = numpy.zeros((len(scripts), max(lengths, default=0)),
+                          dtype=numpy.min_scalar_type(ACTIONS - 1))
+
+    codes = {}
+    for row, script in enumerate(scripts):
+        for column, command in enumerate(script):
+            code = codes.get(command)
+            if code is None:
+                code = codes[command] = encode(command)
+            actions[row, column] = code
+
+    return (actions, lengths)
+
+
+def room_layout(seed, height, width):
+    """Return the room ids of a seed's map, in tile order, from the
+    same 'map' stream and map_layout() as Map.new_map(), without making
+    any Rooms.
+    """
+
+    return map_layout(Streams(seed).get('map'), height, width)
+
+
+class VectorGames(object):
+    """N games in lockstep, one per seed.
+
+    .tile, .turns_left, .inventory - one entry per game
+    .items - item bits per game and tile
+    .visits - times_visited per game and tile
+    .tree_source - NO_TREE, OTHER_TREE or CHRISTMAS_TREE per game
+
+    step() - play one action code in every game
+    run() - play every step of an array of action codes
+    endings() - which of the ENDINGS each game has reached
+    """
+
+    def __init__(self, seeds, height=5, width=5, turns_left=20, swing_range=(2, 5)):
+        if numpy is None:
+            raise ImportError("vector.py needs NumPy: pip install numpy")
+
+        self.seeds = list(seeds)
+        self.height = height
+        self.width = width
+        self.swing_range = swing_range
+        self.home_tile = home_tile(height, width)
+
+        count = len(self.seeds)
+        tile_count = height * width
+
+        # Per room id: starting item bits, and whether it is a ChristmasTree
+        room_items = {}
+        room_christmas = {}
+        for room_id in ROOMS.ids():
+            record = ROOMS.get(room_id)
+            bits = 0
+            for item in record.items:
+                bits |= ITEM_BITS[item]
+            room_items[room_id] = bits
+            room_christmas[room_id] = ROOM_CLASSES[record.room_class] is ChristmasTree
+
+        # Smallest unsigned type holding a bit per item
+        bits_type = numpy.min_scalar_type((1 << len(ITEMS)) - 1)
+
+        items = numpy.empty((count, tile_count), dtype=bits_type)
+        christmas = numpy.empty((count, tile_count), dtype=numpy.bool_)
+        for game, seed in enumerate(self.seeds):
+            layout = room_layout(seed, height, width)
+            items[game] = [room_items[room_id] for room_id in layout]
+            christmas[game] = [room_christmas[room_id] for room_id in layout]
+
+        self.items = items
+        self.christmas = christmas
+        self.visits = numpy.zeros((count, tile_count), dtype=numpy.int32)
+        self.tile = numpy.full(count, self.home_tile, dtype=numpy.int32)
+        self.turns_left = numpy.full(count, turns_left, dtype=numpy.int32)
+        self.inventory = numpy.zeros(count, dtype=bits_type)
+        self.tree_source = numpy.zeros(count, dtype=numpy.int8)
+
+        # index of each game's first tile in the flattened tile arrays
+        self.first_tiles = numpy.arange(count, dtype=numpy.int32) * tile_count
+
+        # neighbors[tile, move code] = tile in that direction, -1 at an edge
+        neighbors = numpy.full((tile_count, len(MOVES) + 1), -1, dtype=numpy.int32)
+        for tile in range(tile_count):
+            row, column = divmod(tile, width)
+            if row > 0:
+                neighbors[tile, MOVES['n']] = tile - width
+            if column < width - 1:
+                neighbors[tile, MOVES['e']] = tile + 1
+            if row < height - 1:
+                neighbors[tile, MOVES['s']] = tile + width
+            if column > 0:
+                neighbors[tile, MOVES['w']] = tile - 1
+        self.neighbors = neighbors
+        self.neighbor_columns = neighbors.shape[1]
+
+        # neighbors column for each action code, 0 (always -1) if not a move
+        move_columns = numpy.zeros(ACTIONS, dtype=numpy.int32)
+        for code in MOVES.values():
+            move_columns[code] = code
+        self.move_columns = move_columns
+
+        # item bit each action code takes, 0 for anything else
+        take_bits = numpy.zeros(ACTIONS, dtype=bits_type)
+        for item, code in TAKES.items():
+            take_bits[code] = ITEM_BITS[item]
+        self.take_bits = take_bits
+
+        # 'combat' streams, only made for games that cut a tree
+        self.combat = {}
+
+    def swings(self, game):
+        stream = self.combat.get(game)
+        if stream is None:
+            stream = self.combat[game] = Streams(self.seeds[game]).get('combat')
+
+        return stream.randint(*self.swing_range)
+
+    def step(self, actions, playing=None):
+        """Play actions[i] in game i, for every game still playing:
+        turns left, and playing[i] True if given.
+        """
+
+        inventory = self.inventory
+        turns_left = self.turns_left
+
+        active = turns_left > 0
+        if playing is not None:
+            active &= playing
+
+        # Index of each game's current tile in the flattened tile arrays
+        here = self.first_tiles + self.tile
+
+        # Enter the current room
+        self.visits.ravel()[here[active]] += 1
+
+        items = self.items.ravel()
+        room_items = items.take(here)
+        had_tree = (inventory & TREE) != 0
+
+        # act_take: the item must be in the room.  act_cut: the axe in
+        # the inventory and a tree in the room.
+        cut = (active & (actions == CUT_TREE) & ((inventory & AXE) != 0)
+               & ((room_items & TREE) != 0))
+        take_bits = self.take_bits.take(actions)
+        take_bits[cut] = TREE
+        take_bits[~active] = 0
+        take_bits &= room_items
+
+        took = take_bits != 0
+        items[here[took]] &= ~take_bits[took]
+        inventory |= take_bits
+        turns_left -= took
+
+        for game in numpy.flatnonzero(cut):
+            # took already counted one turn, the swings count the rest
+            turns_left[game] -= self.swings(int(game)) - 1
+
+        # The room the first tree came from decides the ending
+        new_tree = ~had_tree & ((inventory & TREE) != 0)
+        if new_tree.any():
+            self.tree_source[new_tree] = numpy.where(
+                self.christmas.ravel()[here[new_tree]], CHRISTMAS_TREE, OTHER_TREE)
+
+        # act_move, only onto the map
+        destination = self.neighbors.ravel().take(self.tile * self.neighbor_columns
+                                                  + self.move_columns.take(actions))
+        moved = active & (destination >= 0)
+        numpy.copyto(self.tile, destination, where=moved)
+        turns_left -= moved
+
+    def run(self, actions, lengths=None):
+        """Play column after column of an (games x steps) array of action
+        codes.  Game i stops after lengths[i] steps if lengths is given,
+        like HeadlessGame.run() at the end of its commands.
+        """
+
+        for step in range(actions.shape[1]):
+            playing = None if lengths is None else lengths > step
+            self.step(actions[:, step], playing)
+
+    def endings(self):
+        """Return an array of indexes into ENDINGS, one per game"""
+
+        home = self.tile == self.home_tile
+        endings = numpy.full(len(self.seeds), ENDINGS.index('bad'), dtype=numpy.int8)
+        endings[self.tree_source == OTHER_TREE] = ENDINGS.index('arrested')
+        endings[(self.tree_source == CHRISTMAS_TREE) & ~home] = ENDINGS.index('good')
+        endings[(self.tree_source == CHRISTMAS_TREE) & home] = ENDINGS.index('best')
+
+        return endings
+
+
+def check(seeds, scripts, turns_left=20, swing_range=(2, 5)):
+    """Play each script on its seed in a HeadlessGame and in VectorGames.
+    Return a list of (seed, what differs) for every game that disagrees.
+    """
+
+    actions, lengths = encode_scripts(scripts)
+    vector = VectorGames(seeds, turns_left=turns_left, swing_range=swing_range)
+    vector.run(actions, lengths)
+    endings = vector.endings()
+
+    mismatches = []
+
+    for game, (seed, script) in enumerate(zip(seeds, scripts)):
+        scalar = HeadlessGame(seed, turns_left=turns_left, swing_range=swing_range)
+        scalar.run(script)
+
+        inventory = 0
+        for item in scalar.engine.player_inventory:
+            inventory |= ITEM_BITS[item]
+
+        rooms = [room for tile, room in scalar.map.tiles.loaded()]
+        items = []
+        for room in rooms:
+            bits = 0
+            for item in room.items:
+                bits |= ITEM_BITS[item]
+            items.append(bits)
+
+        expected = {
+            'tile': scalar.map.current_tile,
+            'turns_left': scalar.engine.turns_left,
+            'inventory': inventory,
+            'items': items,
+            'visits': [room.times_visited for room in rooms],
+            'ending': scalar.ending()
+            }
+        actual = {
+            'tile': int(vector.tile[game]),
+            'turns_left': int(vector.turns_left[game]),
+            'inventory': int(vector.inventory[game]),
+            'items': vector.items[game].tolist(),
+            'visits': vector.visits[game].tolist(),
+            'ending': ENDINGS[endings[game]]
+            }
+
+        different = [key for key in expected if expected[key] != actual[key]]
+        if different:
+            mismatches.append((seed, different))
+
+    return mismatches
+
+
+def random_scripts(count, steps, seed=0):
+    """Return count seeded scripts of random commands, mostly moves"""
+
+    rng = random.Random(seed)
+    commands = ["go north", "go east", "go south", "go west", "take axe",
+                "take map", "take tree", "cut tree", "help", "dance"]
+    weights = [4, 4, 4, 4, 2, 1, 1, 2, 1, 1]
+
+    return [rng.choices(commands, weights, k=steps) for script in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step many games in lockstep with NumPy.")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--steps', type=int, default=40)
+    parser.add_argument('--turns', type=int, default=40, help="turns_left at the start")
+    parser.add_argument('--check', type=int, default=500,
+                        help="games to compare against the object engine")
+    args = parser.parse_args(argv)
+
+    scripts = random_scripts(args.check, args.steps)
+    mismatches = check(range(args.check), scripts, args.turns)
+    print(f"Reference check: {len(mismatches)} of {args.check} games differ")
+    for seed, different in mismatches[:10]:
+        print(f"    seed {seed}: {', '.join(different)}")
+
+    # Both engines are timed the same way: setting the games up, then
+    # stepping them, with the rate end to end and for stepping alone
+    scalar_games = min(args.games, 1000)
+    scripts = random_scripts(scalar_games, args.steps, seed=1)
+    start = time.perf_counter()
+    games = [HeadlessGame(seed, turns_left=args.turns) for seed in range(scalar_games)]
+    scalar_setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for game, script in zip(games, scripts):
+        for command in script:
+            game.step(command)
+    scalar_steps = time.perf_counter() - start
+
+    scripts = random_scripts(args.games, args.steps, seed=1)
+    actions, lengths = encode_scripts(scripts)
+
+    start = time.perf_counter()
+    vector = VectorGames(range(args.games), turns_left=args.turns)
+    vector_setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector.run(actions)
+    vector_steps = time.perf_counter() - start
+
+    scalar_total = scalar_games * args.steps / (scalar_setup + scalar_steps)
+    scalar_rate = scalar_games * args.steps / scalar_steps
+    vector_total = args.games * args.steps / (vector_setup + vector_steps)
+    vector_rate = args.games * args.steps / vector_steps
+
+    print(f"{'game steps/s':14} {'end to end':>14} {'stepping':>14} {'setup/game':>12}")
+    print(f"{'Scalar engine':14} {scalar_total:14,.0f} {scalar_rate:14,.0f}"
+          f" {scalar_setup * 1e6 / scalar_games:9.1f} us")
+    print(f"{'VectorGames':14} {vector_total:14,.0f} {vector_rate:14,.0f}"
+          f" {vector_setup * 1e6 / args.games:9.1f} us")
+    print(f"{'speedup':14} {vector_total / scalar_total:13.0f}x {vector_rate / scalar_rate:13.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Fog of war for TENENBAUM maps.
+
+A tile's map_image is hidden until the player has visited it, or until
+they pick up the map, which reveals every tile.  Visibility keeps track
+of that as it happens, so nothing has to be looked at again each turn.
+
+HIDDEN - image of a tile the player can't see yet
+Visibility - which tiles have been revealed
+VisibilityView - read-only images of a Visibility for the screen, with
+    the current tile in brackets
+"""
+
+HIDDEN = "###"
+
+
+class Visibility(object):
+    """Revealed tiles of a world.
+
+    Only the events that change what can be seen update it: reveal()
+    when the player enters a room, reveal_all() when they pick up the
+    map.  Revealed tiles are a set rather than a bitmap over the whole
+    world, so a generated world of any size only costs what was visited.
+
+    .tiles - the world, a FixedWorld or ChunkedWorld
+    .revealed - set of tile numbers the player has visited
+    .whole_map - True once every tile is revealed
+
+    image() - what a tile looks like on the map right now
+    view() - a VisibilityView for the screen
+    rebuild() - start again from the rooms' times_visited
+    fork() - copy, for a forked Map
+    """
+
+    def __init__(self, tiles, whole_map=False):
+        self.tiles = tiles
+        self.revealed = set()
+        self.whole_map = whole_map
+
+    def reveal(self, tile):
+        self.revealed.add(tile)
+
+    def reveal_all(self):
+        self.whole_map = True
+
+    def is_revealed(self, tile):
+        return self.whole_map or tile in self.revealed
+
+    def image(self, tile):
+        if self.whole_map or tile in self.revealed:
+            return self.tiles[tile].map_image
+
+        return HIDDEN
+
+    def view(self, current_tile):
+        return VisibilityView(self, current_tile)
+
+    def rebuild(self, tiles, whole_map):
+        """Reveal every loaded tile whose room has been visited, eg.
+        after the world was replaced by a restored snapshot
+        """
+
+        self.tiles = tiles
+        self.whole_map = whole_map
+        self.revealed = {tile for tile, room in tiles.loaded() if room.times_visited}
+
+    def fork(self, tiles):
+        copy = Visibility(tiles, self.whole_map)
+        copy.revealed = set(self.revealed)
+
+        return copy
+
+
+class VisibilityView(object):
+    """What the screen shows of a Visibility: view[tile] is the tile's
+    image, with brackets around the middle character on the current tile.
+    """
+
+    __slots__ = ('visibility', 'current_tile')
+
+    def __init__(self, visibility, current_tile):
+        self.visibility = visibility
+        self.current_tile = current_tile
+
+    def __getitem__(self, tile):
+        # Visibility.image(), inlined since the screen asks for 25 tiles
+        visibility = self.visibility
+        if visibility.whole_map or tile in visibility.revealed:
+            image = visibility.tiles[tile].map_image
+        else:
+            image = HIDDEN
+
+        if tile == self.current_tile:
+            image = '[' + image[1] + ']'
+
+        return image
@@ -0,0 +1,288 @@
+"""Worlds hold the Rooms of a Map in TENENBAUM.
+
+A distribution is a list of (room type, weight) pairs, where a room
+type is anything the world's new_room function can make a Room from,
+eg. a room id in the room registry.
+
+FixedWorld - every room built up front, from a list
+ChunkedWorld - a world of any size, generated from a seed one square
+    chunk at a time, only once something needs a tile inside it
+
+Both can fork() a copy of themselves that shares every Room with the
+original.  After a fork, writable() must be used to get a Room that is
+about to change: it copies the Room first, the first time only, so
+changes never show up in the other copy.
+
+Both also keep an ItemIndex of the items in their Rooms, as .item_index.
+Whatever takes an item from a Room has to discard() it there too.
+"""
+
+import random
+
+from inventory import ItemIndex
+
+
+class FixedWorld(object):
+    """A world whose rooms all exist from the start.
+
+    With shared=True the Rooms may also be in other worlds, eg. one
+    Room per room id for every new map, so each is copied by writable()
+    before its first change, as after a fork().
+
+    .rooms - list of Rooms, index = tile number
+    """
+
+    def __init__(self, rooms, height, width, shared=False):
+        self.rooms = rooms
+        self.height = height
+        self.width = width
+
+        # tile numbers of Rooms that no other copy of the world shares,
+        # None while nothing is shared
+        self.owned = set() if shared else None
+
+        self.index_items()
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __getitem__(self, tile):
+        return self.rooms[tile]
+
+    def loaded(self):
+        """Return every (tile number, Room) pair that exists"""
+        return enumerate(self.rooms)
+
+    def load_region(self, top, left, height, width):
+        """Nothing to do, return an empty list of new (tile, Room) pairs"""
+        return []
+
+    def index_items(self):
+        """Build the item index again from every Room, eg. after their
+        items were replaced
+        """
+
+        self.item_index = item_index = ItemIndex()
+        tiles = item_index.tiles
+
+        # Inlined add_room(), worlds can hold millions of Rooms
+        for tile, room in enumerate(self.rooms):
+            if room is not None and room.items.counts:
+                for item in room.items.counts:
+                    if item in tiles:
+                        tiles[item].add(tile)
+                    else:
+                        tiles[item] = {tile}
+
+    def writable(self, tile):
+        """Return the Room on tile, copied first if it is shared"""
+
+        room = self.rooms[tile]
+
+        if self.owned is not None and tile not in self.owned:
+            room = room.copy()
+            self.rooms[tile] = room
+            self.owned.add(tile)
+
+        return room
+
+    def fork(self):
+        """Return a copy of this world, sharing its Rooms"""
+
+        self.owned = set()
+        copy = FixedWorld.__new__(FixedWorld)
+        copy.rooms = list(self.rooms)
+        copy.height = self.height
+        copy.width = self.width
+        copy.owned = set()
+        copy.item_index = self.item_index.fork()
+
+        return copy
+
+
+class ChunkedWorld(object):
+    """A world generated in square chunks of chunk_size x chunk_size tiles.
+
+    new_room is called with a room type to make each Room.
+
+    Each chunk gets its own random.Random, seeded from the world seed and
+    the chunk number, so a chunk always comes out the same no matter
+    when or in what order it is generated.
+
+    .chunks - dictionary of generated chunks,
+        key = chunk number,
+        value = list of Rooms in the chunk, row by row
+    """
+
+    def __init__(self, height, width, distribution, seed, new_room,
+                 home_tile=None, home_type=None, chunk_size=32):
+        self.height = height
+        self.width = width
+        self.seed = seed
+        self.new_room = new_room
+        self.home_tile = home_tile
+        self.home_type = home_type
+        self.chunk_size = chunk_size
+        self.chunks_across = -(-width // chunk_size)
+        self.chunks = {}
+        self.item_index = ItemIndex()
+
+        # chunk numbers and tile numbers no other copy of the world
+        # shares, None while nothing is shared
+        self.owned_chunks = None
+        self.owned = None
+
+        self.room_types = [room_type for room_type, weight in distribution]
+        self.cum_weights = []
+        total = 0
+        for room_type, weight in distribution:
+            total += weight
+            self.cum_weights.append(total)
+
+    def __len__(self):
+        return self.height * self.width
+
+    def __getitem__(self, tile):
+        chunk, index = self.find(tile)
+
+        rooms = self.chunks.get(chunk)
+        if rooms is None:
+            rooms = self.generate_chunk(chunk)
+
+        return rooms[index]
+
+    def find(self, tile):
+        """Return (chunk number, index of the tile within the chunk)"""
+
+        row, column = divmod(tile, self.width)
+        size = self.chunk_size
+        chunk = (row // size) * self.chunks_across + column // size
+
+        top, left = self.chunk_corner(chunk)
+        chunk_width = min(size, self.width - left)
+
+        return (chunk, (row - top) * chunk_width + (column - left))
+
+    def chunk_corner(self, chunk):
+        """Return (top row, left column) of a chunk"""
+
+        chunk_row, chunk_column = divmod(chunk, self.chunks_across)
+
+        return (chunk_row * self.chunk_size, chunk_column * self.chunk_size)
+
+    def chunk_tiles(self, chunk):
+        """Return the tile numbers in a chunk, row by row"""
+
+        top, left = self.chunk_corner(chunk)
+        bottom = min(top + self.chunk_size, self.height)
+        right = min(left + self.chunk_size, self.width)
+
+        return [row * self.width + column
+                for row in range(top, bottom)
+                for column in range(left, right)]
+
+    def generate_chunk(self, chunk):
+        """Build the Rooms of a chunk, store and return them"""
+
+        tiles = self.chunk_tiles(chunk)
+        rng = random.Random(f"{self.seed}:{chunk}")
+        room_types = rng.choices(self.room_types, cum_weights=self.cum_weights, k=len(tiles))
+
+        rooms = []
+        for tile, room_type in zip(tiles, room_types):
+            if tile == self.home_tile:
+                room_type = self.home_type
+            room = self.new_room(room_type)
+            rooms.append(room)
+            if room.items.counts:
+                self.item_index.add_room(tile, room)
+
+        self.chunks[chunk] = rooms
+
+        # A chunk generated after a fork belongs to this copy alone
+        if self.owned_chunks is not None:
+            self.owned_chunks.add(chunk)
+
+        return rooms
+
+    def loaded(self):
+        """Yield (tile number, Room) for every tile generated so far"""
+
+        for chunk, rooms in self.chunks.items():
+            yield from zip(self.chunk_tiles(chunk), rooms)
+
+    def load_region(self, top, left, height, width):
+        """Generate any chunks overlapping the given rectangle of tiles,
+        return a list of the (tile number, Room) pairs that were added.
+        """
+
+        size = self.chunk_size
+        bottom = min(top + height, self.height) - 1
+        right = min(left + width, self.width) - 1
+
+        added = []
+        for chunk_row in range(max(top, 0) // size, bottom // size + 1):
+            for chunk_column in range(max(left, 0) // size, right // size + 1):
+                chunk = chunk_row * self.chunks_across + chunk_column
+                if chunk not in self.chunks:
+                    rooms = self.generate_chunk(chunk)
+                    added.extend(zip(self.chunk_tiles(chunk), rooms))
+
+        return added
+
+    def index_items(self):
+        """Build the item index again from every generated Room, eg.
+        after their items were replaced
+        """
+
+        self.item_index = ItemIndex()
+
+        for tile, room in self.loaded():
+            self.item_index.add_room(tile, room)
+
+    def writable(self, tile):
+        """Return the Room on tile, copied first if it is shared"""
+
+        room = self[tile]
+
+        if self.owned is None or tile in self.owned:
+            return room
+
+        chunk, index = self.find(tile)
+        rooms = self.chunks[chunk]
+
+        if chunk not in self.owned_chunks:
+            rooms = list(rooms)
+            self.chunks[chunk] = rooms
+            self.owned_chunks.add(chunk)
+
+        room = room.copy()
+        rooms[index] = room
+        self.owned.add(tile)
+
+        return room
+
+    def empty(self, seed):
+        """Return a world like this one, from another seed, with no
+        chunks generated yet.
+        """
+
+        world = ChunkedWorld(self.height, self.width, [], seed, self.new_room,
+                             self.home_tile, self.home_type, self.chunk_size)
+        world.room_types = self.room_types
+        world.cum_weights = self.cum_weights
+
+        return world
+
+    def fork(self):
+        """Return a copy of this world, sharing its chunks and Rooms"""
+
+        copy = self.empty(self.seed)
+        copy.chunks = dict(self.chunks)
+        copy.item_index = self.item_index.fork()
+
+        for world in (self, copy):
+            world.owned_chunks = set()
+            world.owned = set()
+
+        return copy